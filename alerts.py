@@ -5,33 +5,196 @@ Alert system for notifying users about car listings that match their preferences
 import logging
 import re
 import asyncio
+import heapq
 from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, asdict
 from datetime import datetime
+from functools import lru_cache
+from aiolimiter import AsyncLimiter
+from cachetools import TTLCache
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by the application (main.py); this module only creates loggers
 logger = logging.getLogger("alerts")
 
+# Telegram allows about 20 messages per minute to one chat; the bot-wide ~30/second limit is
+# enforced by the bot's own rate limiter (see BOT_MAX_MESSAGES_PER_SECOND in main.py)
+PER_CHAT_RATE_LIMIT = (20, 60)
+
+# Per-chat limiters kept at once. Limiters expire after a whole PER_CHAT_RATE_LIMIT period
+# idle, once fully drained, and expired ones are purged before each insert. Only a full cache
+# would evict a limiter still in use (the least recently used one), letting that chat exceed
+# its limit; the bot sends at most ~30 messages/second, so no more than 30 * 60 = 1,800 chats
+# can be active within one period, well under this size
+CHAT_LIMITERS_MAX = 10_000
+
+# Attempts per alert before giving up on rate limits, timeouts and network errors; the bot's
+# rate limiter doesn't retry, so this is the only retry layer for alerts
+SEND_ATTEMPTS = 3
+
+# Maximum alerts in flight at once; the bot's HTTP connection pool should be at least this big
+MAX_CONCURRENT_SENDS = 8
+
+# Subscription tiers change rarely, so the Users sheet is re-read at most this often
+USERS_CACHE_TTL = 300  # seconds
+
+# Remember which listings each user has been alerted about for this long, to avoid repeats
+SENT_ALERTS_TTL = 24 * 60 * 60  # seconds
+SENT_ALERTS_MAX = 100_000
+
+# Maximum alerts sent per run for each subscription tier (unknown tiers get 1)
+MAX_ALERTS_BY_TIER = {
+    'Premium': 10,  # Premium users get up to 10 alerts
+    'Basic': 3,     # Basic users get up to 3 alerts
+    'None': 1       # Non-subscribers get at most 1 alert
+}
+
+# Characters that must be escaped in MarkdownV2 text, and inside the (...) part of a link
+_MD2_ESCAPE = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+_MD2_URL_ESCAPE = re.compile(r'([)\\])')
+
+def _escape_md(value: Any) -> str:
+    """Escape a value for literal display in a MarkdownV2 message.
+    
+    Args:
+        value: Value to display (converted to a string)
+        
+    Returns:
+        Escaped text
+    """
+    return _MD2_ESCAPE.sub(r'\\\1', str(value))
+
+def _escape_md_url(url: str) -> str:
+    """Escape a URL for use as the target of a MarkdownV2 link.
+    
+    Args:
+        url: Link target
+        
+    Returns:
+        Escaped URL
+    """
+    return _MD2_URL_ESCAPE.sub(r'\\\1', url)
+
+@lru_cache(maxsize=8192)
+def _format_price(price: int) -> str:
+    """Format a (MarkdownV2-escaped) price with a pound sign and thousands separators.
+    
+    Cached because prices repeat a lot.
+    
+    Args:
+        price: Price in pounds
+        
+    Returns:
+        Formatted price, e.g. "£14,500"
+    """
+    return _escape_md(f"£{price:,}")
+
+@lru_cache(maxsize=8192)
+def _format_mileage(mileage: int) -> str:
+    """Format a (MarkdownV2-escaped) mileage with thousands separators.
+    
+    Cached because mileages repeat a lot.
+    
+    Args:
+        mileage: Mileage in miles
+        
+    Returns:
+        Formatted mileage, e.g. "45,000 miles"
+    """
+    return _escape_md(f"{mileage:,} miles")
+
+@lru_cache(maxsize=2048)
+def _format_market_suffix(price: int, market_avg: float) -> str:
+    """Format the (MarkdownV2-escaped) market comparison shown after the price.
+    
+    Cached because listings of the same car share a market average and often a price.
+    
+    Args:
+        price: Listing price in pounds
+        market_avg: Market average price in pounds
+        
+    Returns:
+        Formatted market comparison, e.g. " (Market avg: £19,200, 24% below market)"
+    """
+    price_diff_pct = ((market_avg - price) / market_avg) * 100
+    return _escape_md(f" (Market avg: £{market_avg:,}, {price_diff_pct:.0f}% below market)")
+
+def _score_key(match: Dict[str, Any]) -> float:
+    """Sort key ranking matches by deal score."""
+    return match.get('score', 0)
+
+def _price_key(match: Dict[str, Any]) -> float:
+    """Sort key ranking matches by price."""
+    return match.get('price', 0)
+
+# Alert headline for each deal grade, and the grades that get the urgent header emoji
+GRADE_EMPHASIS = {
+    'A+': _escape_md("A+ EXCEPTIONAL DEAL ALERT!"),
+    'A': _escape_md("A GREAT DEAL ALERT!"),
+    'B': _escape_md("B GOOD DEAL ALERT!")
+}
+DEFAULT_EMPHASIS = _escape_md("DEAL ALERT!")
+HOT_GRADES = frozenset({'A+', 'A'})
+
+# Fixed alert fragments (already MarkdownV2-escaped), built once at import
+HOT_HEADER_EMOJI = "🚨"
+DEFAULT_HEADER_EMOJI = "🚘"
+ALERT_HEADER_TEMPLATE = "{badge}{emoji} *{emphasis}* {emoji}\n"
+PREMIUM_BADGE = "🔸 *PREMIUM ALERT* 🔸\n"
+PREMIUM_FOOTER = "\n\n_" + _escape_md("Premium subscribers receive enhanced alerts with additional data points.") + "_"
+SPECS_SEPARATOR = " " + _escape_md("|") + " "
+
+@dataclass(slots=True)
+class AlertStats:
+    """Counters collected while processing a batch of matches."""
+    total_users: int = 0
+    total_matches: int = 0
+    alerts_sent: int = 0
+    failures: int = 0
+    users_notified: int = 0
+    alerts_deduped: int = 0
+
 class AlertEngine:
-    """Engine for generating and sending alerts about car listings."""
+    """Engine for generating and sending alerts about car listings.
+    
+    The engine sends alerts concurrently, so the bot it is given should use a
+    pooled HTTP connection (see BOT_CONNECTION_POOL_SIZE in main.py) with room
+    for at least max_concurrent_sends requests, so keep-alive connections are reused.
+    """
     
-    def __init__(self, bot: Bot):
+    # Alert message skeletons; _generate_alert_message only fills in the variable parts
+    _MSG_TMPL = (
+        "{header}"
+        "🚗 *{year} {make} {model}*\n"
+        "{title_line}"
+        "💰 *Price: {price}*{market_suffix}\n"
+        "{specs}\n"
+        "{score_line}{assessment}{suggestion}{link}{footer}"
+    )
+    _SUGGESTION_TMPL = "💬 *Suggested message:* \"Hi, is your {year} {make} {model} still available? I can view it soon if it is\\.\"\n"
+    
+    def __init__(self, bot: Bot, max_concurrent_sends: int = MAX_CONCURRENT_SENDS):
         """Initialize the alert engine.
         
         Args:
             bot: Telegram bot instance for sending messages
+            max_concurrent_sends: Maximum number of alerts in flight at once
         """
         self.logger = logging.getLogger("alerts.engine")
         self.bot = bot
+        self.max_concurrent_sends = max_concurrent_sends
+        self._chat_limiters = TTLCache(maxsize=CHAT_LIMITERS_MAX, ttl=PER_CHAT_RATE_LIMIT[1])
+        self._users_cache = TTLCache(maxsize=1, ttl=USERS_CACHE_TTL)
+        self._users_cache_lock = asyncio.Lock()
+        self._sent_cache = TTLCache(maxsize=SENT_ALERTS_MAX, ttl=SENT_ALERTS_TTL)
     
     async def process_matches(self, user_matches: Dict[str, List[Dict[str, Any]]], sheets_manager=None) -> Dict[str, int]:
         """Process matches and send alerts to users.
         
+        Alerts are fed through a bounded queue to a fixed pool of sender
+        workers, so sends overlap without holding every pending alert in memory.
+        
         Args:
             user_matches: Dictionary mapping user_ids to lists of matching listings
             sheets_manager: Optional SheetsManager instance for updating notification status
@@ -39,100 +202,188 @@ class AlertEngine:
         Returns:
             Dictionary with statistics about alerts sent
         """
-        alert_stats = {
-            "total_users": len(user_matches),
-            "total_matches": sum(len(matches) for matches in user_matches.values()),
-            "alerts_sent": 0,
-            "failures": 0,
-            "users_notified": 0
-        }
-        
-        self.logger.info(f"Processing matches for {alert_stats['total_users']} users with {alert_stats['total_matches']} total matches")
-        
-        # Process each user's matches
-        for user_id, matches in user_matches.items():
-            if not matches:
-                continue
+        alert_stats = AlertStats(
+            total_users=len(user_matches),
+            total_matches=sum(len(matches) for matches in user_matches.values())
+        )
+        
+        self.logger.info("Processing matches for %d users with %d total matches",
+                         alert_stats.total_users, alert_stats.total_matches)
+        
+        # Start the sender workers
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.max_concurrent_sends)
+        results: List[Tuple[str, Dict[str, Any], bool]] = []
+        workers = [
+            asyncio.create_task(self._send_worker(queue, results))
+            for _ in range(self.max_concurrent_sends)
+        ]
+        
+        # Work out which of each user's matches should be sent and queue them
+        user_alert_counts = {}
+        tier_map = None
+        seen = set()  # (user_id, listing key) pairs already picked up in this run
+        try:
+            for user_id, matches in user_matches.items():
+                if not matches:
+                    continue
                 
-            # Sort matches by score if available, otherwise by price
-            if 'score' in matches[0]:
-                sorted_matches = sorted(matches, key=lambda x: x.get('score', 0), reverse=True)
-            else:
-                sorted_matches = sorted(matches, key=lambda x: x.get('price', 0))
-            
-            # Send alerts for this user's top matches
-            user_alert_count = 0
-            try:
-                # Get user's subscription tier from the first match (all matches should have same user_id)
-                user_subscription = self._get_user_subscription(matches[0], sheets_manager)
+                # Drop listings this user was already alerted about recently, or that appear
+                # twice in this run (the sent cache is only filled once every send finishes)
+                unsent_matches = []
+                for match in matches:
+                    listing_key = self._listing_key(match)
+                    if listing_key:
+                        sent_key = (user_id, listing_key)
+                        if sent_key in seen or sent_key in self._sent_cache:
+                            continue
+                        seen.add(sent_key)
+                    unsent_matches.append(match)
+                alert_stats.alerts_deduped += len(matches) - len(unsent_matches)
+                matches = unsent_matches
+                if not matches:
+                    continue
                 
-                # Determine how many alerts to send based on subscription tier
-                max_alerts = self._get_max_alerts(user_subscription)
+                user_alert_counts[user_id] = 0
                 
-                # Send alerts up to the maximum
-                for match in sorted_matches[:max_alerts]:
-                    if await self.send_alert(user_id, match):
-                        user_alert_count += 1
-                        alert_stats["alerts_sent"] += 1
-                        
-                        # Update notification status in Google Sheets if a sheets_manager is provided
-                        if sheets_manager:
-                            self._update_notification_status(match, user_id, sheets_manager)
-                    else:
-                        alert_stats["failures"] += 1
+                # Every tier allows at least one alert, so a single match needs no tier lookup
+                if len(matches) == 1:
+                    top_matches = matches
+                else:
+                    # Look up every user's subscription tier with a single sheet read, on first use
+                    # (sheet errors are handled inside and fall back to the default tier)
+                    if tier_map is None:
+                        tier_map = await self._load_subscription_tiers(sheets_manager)
+                    user_subscription = tier_map.get(str(user_id)) or 'Basic'
+                    
+                    # Determine how many alerts to send based on subscription tier
+                    max_alerts = MAX_ALERTS_BY_TIER.get(user_subscription, 1)
+                    
+                    # Pick the best matches by score if available, otherwise the cheapest;
+                    # only max_alerts are needed, so avoid sorting the whole list
+                    try:
+                        if 'score' in matches[0]:
+                            top_matches = heapq.nlargest(max_alerts, matches, key=_score_key)
+                        else:
+                            top_matches = heapq.nsmallest(max_alerts, matches, key=_price_key)
+                    except TypeError as e:
+                        # Scores or prices that can't be compared, e.g. None mixed with numbers
+                        self.logger.error("Error ranking matches for user %s: %s", user_id, e)
+                        alert_stats.failures += 1
+                        continue
                 
-            except Exception as e:
-                self.logger.error(f"Error processing alerts for user {user_id}: {e}")
-                alert_stats["failures"] += 1
+                # Queue alerts up to the maximum; send failures are reported by send_alert itself
+                for match in top_matches:
+                    await queue.put((user_id, match))
             
+            # Wait for every queued alert to be sent
+            await queue.join()
+        finally:
+            # Stop the workers
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        notification_updates = []
+        for user_id, match, sent in results:
+            if sent:
+                user_alert_counts[user_id] += 1
+                alert_stats.alerts_sent += 1
+                listing_key = self._listing_key(match)
+                if listing_key:
+                    self._sent_cache[(user_id, listing_key)] = True
+                
+                # Queue a notification status update for the listing
+                listing_id = match.get('id') or match.get('listing_id')
+                if listing_id:
+                    notification_updates.append((listing_id, user_id))
+            else:
+                alert_stats.failures += 1
+        
+        for user_id, user_alert_count in user_alert_counts.items():
             # Count user as notified if at least one alert was sent
             if user_alert_count > 0:
-                alert_stats["users_notified"] += 1
+                alert_stats.users_notified += 1
                 
-            self.logger.info(f"Sent {user_alert_count} alerts to user {user_id}")
+            self.logger.info("Sent %d alerts to user %s", user_alert_count, user_id)
+        
+        # Update notification status in Google Sheets in one batch if a sheets_manager is provided
+        if sheets_manager and notification_updates:
+            await self._update_notification_status(notification_updates, sheets_manager)
         
-        self.logger.info(f"Alert processing complete: {alert_stats['alerts_sent']} alerts sent to {alert_stats['users_notified']} users")
-        return alert_stats
+        self.logger.info("Alert processing complete: %d alerts sent to %d users",
+                         alert_stats.alerts_sent, alert_stats.users_notified)
+        return asdict(alert_stats)
     
-    def _get_user_subscription(self, match: Dict[str, Any], sheets_manager) -> str:
-        """Get a user's subscription tier.
+    @staticmethod
+    def _listing_key(match: Dict[str, Any]) -> Optional[str]:
+        """Get an identifier for a listing, for de-duplicating alerts.
         
         Args:
-            match: A match for the user (contains user_id)
-            sheets_manager: SheetsManager instance for querying user info
+            match: The matching car listing
             
         Returns:
-            Subscription tier (e.g., 'Basic', 'Premium', 'None')
+            Listing ID, falling back to the listing URL
         """
-        user_id = match.get('user_id')
+        return match.get('id') or match.get('listing_id') or match.get('url')
+    
+    async def _send_worker(self, queue: asyncio.Queue, results: List[Tuple[str, Dict[str, Any], bool]]) -> None:
+        """Send queued alerts until cancelled, recording the outcome of each.
         
-        if not user_id or not sheets_manager:
-            return 'Basic'  # Default to Basic tier if no sheets_manager
+        Args:
+            queue: Queue of (user_id, match) tuples to send
+            results: List that (user_id, match, sent) tuples are appended to
+        """
+        while True:
+            user_id, match = await queue.get()
+            try:
+                sent = await self.send_alert(user_id, match)
+            except Exception as e:
+                self.logger.error("Error sending alert to user %s: %s", user_id, e)
+                sent = False
+            results.append((user_id, match, sent))
+            queue.task_done()
+    
+    async def _load_users(self, sheets_manager) -> List[Dict[str, Any]]:
+        """Load all user records from the Users sheet, cached for USERS_CACHE_TTL seconds.
         
-        try:
-            # Query the user's subscription tier
-            tier = sheets_manager.get_subscription_tier(user_id)
-            return tier if tier else 'Basic'  # Default if tier not found
-        except Exception as e:
-            self.logger.error(f"Error getting subscription for user {user_id}: {e}")
-            return 'Basic'  # Default on error
+        The sheet is read in a worker thread so the event loop keeps serving other updates.
+        
+        Args:
+            sheets_manager: SheetsManager instance for querying user info
+            
+        Returns:
+            List of user records (empty list if they could not be loaded)
+        """
+        if not sheets_manager:
+            return []
+        
+        async with self._users_cache_lock:
+            users = self._users_cache.get('users')
+            if users is not None:
+                return users
+            
+            try:
+                users = await asyncio.to_thread(sheets_manager.users_sheet.get_all_records)
+            except Exception as e:
+                self.logger.error("Error loading users: %s", e)
+                return []
+            
+            self._users_cache['users'] = users
+            return users
     
-    def _get_max_alerts(self, subscription_tier: str) -> int:
-        """Get the maximum number of alerts based on subscription tier.
+    async def _load_subscription_tiers(self, sheets_manager) -> Dict[str, str]:
+        """Load every user's subscription tier from the (cached) Users sheet.
         
         Args:
-            subscription_tier: User's subscription tier
+            sheets_manager: SheetsManager instance for querying user info
             
         Returns:
-            Maximum number of alerts to send
+            Dictionary mapping user_id (as a string) to subscription tier
         """
-        tiers = {
-            'Premium': 10,  # Premium users get up to 10 alerts
-            'Basic': 3,     # Basic users get up to 3 alerts
-            'None': 1       # Non-subscribers get at most 1 alert
+        return {
+            str(user.get('user_id', '')): user.get('subscription_tier', 'Basic')
+            for user in await self._load_users(sheets_manager)
         }
-        
-        return tiers.get(subscription_tier, 1)  # Default to 1 if tier not found
     
     async def send_alert(self, user_id: str, match: Dict[str, Any]) -> bool:
         """Send an alert to a user about a matching car listing.
@@ -147,24 +398,59 @@ class AlertEngine:
         try:
             # Generate the alert message
             message = self._generate_alert_message(match)
-            
-            # Send the message to the user
+        except Exception as e:
+            self.logger.error("Error generating alert for user %s: %s", user_id, e)
+            return False
+        
+        # Send the message to the user, retrying transient failures
+        for attempt in range(SEND_ATTEMPTS):
+            try:
+                await self._send_message(user_id, message)
+                
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info("Sent alert to user %s for %s %s", user_id, match.get('make', ''), match.get('model', ''))
+                return True
+                
+            except BadRequest as e:
+                # BadRequest subclasses NetworkError but will fail the same way again
+                self.logger.error("Telegram rejected alert to user %s: %s", user_id, e)
+                return False
+            except (RetryAfter, NetworkError) as e:
+                if attempt == SEND_ATTEMPTS - 1:
+                    self.logger.error("Giving up sending alert to user %s after %d attempts: %s", user_id, SEND_ATTEMPTS, e)
+                    return False
+                
+                # Wait as long as Telegram asks on a rate limit, otherwise back off exponentially
+                delay = e.retry_after if isinstance(e, RetryAfter) else 2 ** attempt
+                self.logger.warning("Error sending alert to user %s (%s), retrying in %ss", user_id, e, delay)
+                await asyncio.sleep(delay)
+            except TelegramError as e:
+                self.logger.error("Telegram error sending alert to user %s: %s", user_id, e)
+                return False
+            except Exception as e:
+                self.logger.error("Error sending alert to user %s: %s", user_id, e)
+                return False
+        
+        return False
+    
+    async def _send_message(self, user_id: str, message: str) -> None:
+        """Send a message once the chat's rate limiter allows it.
+        
+        Args:
+            user_id: Telegram user ID
+            message: Formatted alert message
+        """
+        # Re-inserting the limiter restarts its TTL, so only idle chats are evicted
+        chat_limiter = self._chat_limiters.get(user_id) or AsyncLimiter(*PER_CHAT_RATE_LIMIT)
+        self._chat_limiters[user_id] = chat_limiter
+        
+        async with chat_limiter:
             await self.bot.send_message(
                 chat_id=user_id,
                 text=message,
-                parse_mode="MARKDOWN",
+                parse_mode="MarkdownV2",
                 disable_web_page_preview=True  # Don't preview the URL
             )
-            
-            self.logger.info(f"Sent alert to user {user_id} for {match.get('make', '')} {match.get('model', '')}")
-            return True
-            
-        except TelegramError as e:
-            self.logger.error(f"Telegram error sending alert to user {user_id}: {e}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Error sending alert to user {user_id}: {e}")
-            return False
     
     def _generate_alert_message(self, match: Dict[str, Any]) -> str:
         """Generate an alert message for a matching car listing.
@@ -173,20 +459,20 @@ class AlertEngine:
             match: The matching car listing with score
             
         Returns:
-            Formatted alert message
+            Formatted alert message (MarkdownV2)
         """
-        # Extract basic information
-        make = match.get('make', 'Unknown')
-        model = match.get('model', 'Unknown')
-        year = match.get('year', 'Unknown')
+        # Extract basic information, escaping free-text fields for MarkdownV2
+        make = _escape_md(match.get('make', 'Unknown'))
+        model = _escape_md(match.get('model', 'Unknown'))
+        year = _escape_md(match.get('year', 'Unknown'))
         price = match.get('price', 0)
         mileage = match.get('mileage', 'Unknown')
-        location = match.get('location', 'Unknown')
-        fuel_type = match.get('fuel_type', '')
-        transmission = match.get('transmission', '')
-        url = match.get('url', '')
-        source = match.get('source', '')
-        title = match.get('title', '')
+        location = _escape_md(match.get('location', 'Unknown'))
+        fuel_type = _escape_md(match.get('fuel_type', ''))
+        transmission = _escape_md(match.get('transmission', ''))
+        url = _escape_md_url(match.get('url', ''))
+        source = _escape_md(match.get('source', ''))
+        title = _escape_md(match.get('title', ''))
         
         # Extract score information if available
         score = match.get('score', None)
@@ -198,53 +484,30 @@ class AlertEngine:
         is_premium = self._is_premium_user(user_id)
         
         # Format the price with thousands separator
-        price_formatted = f"£{price:,}" if price else "Unknown"
+        price_formatted = _format_price(price) if price else "Unknown"
         
         # Format the mileage with thousands separator
-        mileage_formatted = f"{mileage:,} miles" if mileage else "Unknown mileage"
+        mileage_formatted = _format_mileage(mileage) if mileage else "Unknown mileage"
         
         # Determine alert emphasis based on grade
-        alert_emphasis = "DEAL ALERT!"
-        if grade == 'A+':
-            alert_emphasis = "A+ EXCEPTIONAL DEAL ALERT!"
-        elif grade == 'A':
-            alert_emphasis = "A GREAT DEAL ALERT!"
-        elif grade == 'B':
-            alert_emphasis = "B GOOD DEAL ALERT!"
-        
-        # Add premium badge for premium users
-        if is_premium:
-            premium_badge = "🔸 *PREMIUM ALERT* 🔸\n"
-        else:
-            premium_badge = ""
-        
-        # Build the message with grade-specific formatting
-        message_parts = []
+        alert_emphasis = GRADE_EMPHASIS.get(grade, DEFAULT_EMPHASIS)
         
-        # Alert header
-        if grade in ['A+', 'A']:
-            message_parts.append(f"{premium_badge}🚨 *{alert_emphasis}* 🚨\n")
-        else:
-            message_parts.append(f"{premium_badge}🚘 *{alert_emphasis}* 🚘\n")
-        
-        # Car details section
-        message_parts.append(f"🚗 *{year} {make} {model}*\n")
+        # Alert header with grade-specific emoji, plus a badge for premium users
+        header = ALERT_HEADER_TEMPLATE.format(
+            badge=PREMIUM_BADGE if is_premium else "",
+            emoji=HOT_HEADER_EMOJI if grade in HOT_GRADES else DEFAULT_HEADER_EMOJI,
+            emphasis=alert_emphasis
+        )
         
         # Add title if available and user is premium
-        if is_premium and title:
-            message_parts.append(f"📋 {title}\n")
+        title_line = f"📋 {title}\n" if is_premium and title else ""
         
-        # Price section with market comparison if available
-        price_section = f"💰 *Price: {price_formatted}*"
+        # Market comparison if available
         market_avg = score_details.get('market_average', None)
-        if market_avg:
-            price_diff_pct = ((market_avg - price) / market_avg) * 100
-            price_section += f" (Market avg: £{market_avg:,}, {price_diff_pct:.0f}% below market)"
-        message_parts.append(price_section + "\n")
+        market_suffix = _format_market_suffix(price, market_avg) if market_avg else ""
         
         # Car specifications
-        specs = []
-        specs.append(f"🔄 {mileage_formatted}")
+        specs = [f"🔄 {mileage_formatted}"]
         if fuel_type:
             specs.append(f"⛽ {fuel_type}")
         if transmission:
@@ -252,39 +515,52 @@ class AlertEngine:
         specs.append(f"📍 {location}")
         if is_premium and source:
             specs.append(f"🔍 {source}")
-        message_parts.append(" | ".join(specs) + "\n")
+        specs_line = SPECS_SEPARATOR.join(specs)
         
-        # Score and grade if available
+        # Score and grade if available, with whichever sub-scores are present
+        score_line = ""
         if score is not None:
-            message_parts.append(f"📊 *Score: {score:.1f} ({grade})*")
+            breakdown = []
             if score_details.get('price_score'):
-                message_parts.append(f" (Price: {score_details['price_score']:.1f}")
+                breakdown.append(f"Price: {score_details['price_score']:.1f}")
             if score_details.get('mileage_score'):
-                message_parts.append(f", Mileage: {score_details['mileage_score']:.1f})")
-            else:
-                message_parts.append(")")
-            message_parts.append("\n")
+                breakdown.append(f"Mileage: {score_details['mileage_score']:.1f}")
+            breakdown_text = _escape_md(f" ({', '.join(breakdown)})") if breakdown else ""
+            score_line = f"📊 *{_escape_md(f'Score: {score:.1f} ({grade})')}*{breakdown_text}\n"
         
         # Premium-only detailed assessment
+        assessment_line = ""
         if is_premium:
             assessment = self._generate_premium_assessment(match)
             if assessment:
-                message_parts.append(f"{assessment}\n")
+                assessment_line = f"{assessment}\n"
         
         # Suggested message to seller
+        suggestion = ""
         if make and model:
-            message_parts.append(f"💬 *Suggested message:* \"Hi, is your {year} {make} {model} still available? I can view it soon if it is.\"\n")
+            suggestion = self._SUGGESTION_TMPL.format(year=year, make=make, model=model)
         
         # Link to the listing
-        if url:
-            message_parts.append(f"\n➡️ [View Listing]({url})")
-            
-        # Add premium footer
-        if is_premium:
-            message_parts.append("\n\n_Premium subscribers receive enhanced alerts with additional data points._")
+        link = f"\n➡️ [View Listing]({url})" if url else ""
         
-        # Join all parts into a single message
-        return "".join(message_parts)
+        # Add premium footer
+        footer = PREMIUM_FOOTER if is_premium else ""
+        
+        return self._MSG_TMPL.format(
+            header=header,
+            year=year,
+            make=make,
+            model=model,
+            title_line=title_line,
+            price=price_formatted,
+            market_suffix=market_suffix,
+            specs=specs_line,
+            score_line=score_line,
+            assessment=assessment_line,
+            suggestion=suggestion,
+            link=link,
+            footer=footer
+        )
     
     def _is_premium_user(self, user_id: str) -> bool:
         """Check if a user has premium subscription.
@@ -300,7 +576,7 @@ class AlertEngine:
             subscription_manager = get_subscription_manager()
             return subscription_manager.is_user_premium(user_id)
         except Exception as e:
-            self.logger.error(f"Error checking premium status: {e}")
+            self.logger.error("Error checking premium status: %s", e)
             return False
     
     def _generate_premium_assessment(self, match: Dict[str, Any]) -> str:
@@ -324,52 +600,68 @@ class AlertEngine:
         assessment_parts = ["*Premium Assessment:*\n"]
         
         if price_score > 85:
-            assessment_parts.append("✅ *Exceptional value* - Significantly below market price")
+            assessment_parts.append("✅ *Exceptional value* \\- Significantly below market price")
         elif price_score > 75:
-            assessment_parts.append("✅ *Great value* - Well below typical market price")
+            assessment_parts.append("✅ *Great value* \\- Well below typical market price")
         elif price_score > 65:
-            assessment_parts.append("✅ *Good value* - Below average market price")
+            assessment_parts.append("✅ *Good value* \\- Below average market price")
         elif price_score < 40:
-            assessment_parts.append("❌ *Overpriced* - Above typical market value")
+            assessment_parts.append("❌ *Overpriced* \\- Above typical market value")
         
         if mileage_score > 85:
-            assessment_parts.append("✅ *Low mileage* - Well below average for this vehicle age")
+            assessment_parts.append("✅ *Low mileage* \\- Well below average for this vehicle age")
         elif mileage_score > 75:
-            assessment_parts.append("✅ *Good mileage* - Below average for vehicle age")
+            assessment_parts.append("✅ *Good mileage* \\- Below average for vehicle age")
         elif mileage_score < 40:
-            assessment_parts.append("⚠️ *High mileage* - Above average for vehicle age")
+            assessment_parts.append("⚠️ *High mileage* \\- Above average for vehicle age")
         
         if len(assessment_parts) <= 1:
             return ""
             
         return "\n".join(assessment_parts)
         
-    def _update_notification_status(self, match: Dict[str, Any], user_id: str, sheets_manager) -> bool:
-        """Update the notification status in Google Sheets.
+    async def _update_notification_status(self, updates: List[Tuple[str, str]], sheets_manager) -> bool:
+        """Update the notification status of alerted listings in Google Sheets.
+        
+        Called once per run with every update, after the alerts have been sent,
+        so a real write can go out as a single batch request off the event loop.
         
         Args:
-            match: The listing that was alerted
-            user_id: The user who was notified
+            updates: List of (listing_id, user_id) tuples for listings that were alerted
             sheets_manager: SheetsManager instance
             
         Returns:
             bool: True if update was successful, False otherwise
         """
         try:
-            listing_id = match.get('id') or match.get('listing_id')
-            if not listing_id:
-                return False
-                
             # The implementation here will depend on your sheets structure
             # This is a placeholder for the actual implementation
-            # sheets_manager.update_notification_status(listing_id, user_id)
+            # await asyncio.to_thread(sheets_manager.batch_update_notification_status, updates)
             
             return True
         except Exception as e:
-            self.logger.error(f"Error updating notification status: {e}")
+            self.logger.error("Error updating notification status: %s", e)
             return False
 
 
+# Global alert engine instance, shared so its caches and rate limiters persist between runs
+_alert_engine = None
+
+def get_alert_engine(bot: Bot) -> AlertEngine:
+    """Get the global AlertEngine instance.
+    
+    Args:
+        bot: Telegram bot instance for sending messages
+        
+    Returns:
+        AlertEngine instance
+    """
+    global _alert_engine
+    if _alert_engine is None or _alert_engine.bot is not bot:
+        _alert_engine = AlertEngine(bot)
+    return _alert_engine
+
+
 # Test function to generate sample alert messages
 def test_alert_messages():
     """Test generating alert messages with sample data."""
@@ -435,4 +727,8 @@ def test_alert_messages():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     test_alert_messages()
@@ -1,18 +1,90 @@
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ChatAction
+from telegram.helpers import escape_markdown
 from telegram.ext import (
     ContextTypes, ConversationHandler, CommandHandler,
-    MessageHandler, filters, CallbackQueryHandler
+    MessageHandler, filters, CallbackQueryHandler, TypeHandler
 )
+from dataclasses import dataclass, asdict
+from datetime import date
+from typing import Optional
+from cachetools import TTLCache
+import asyncio
 import logging
+import re
+import sys
 
-# Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO
-)
+# Logging is configured by the application (main.py); this module only creates loggers
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class CarPreferences:
+    """Car preferences collected over the steps of the /mycars conversation."""
+    make: str = ''
+    model: str = ''
+    year_range: str = ''
+    min_year: int = 0
+    max_year: int = 9999
+    price_range: str = ''
+    min_price: int = 0
+    max_price: int = 9999999
+    location: str = ''
+    # None until the user reaches (or skips) the advanced options
+    fuel_type: Optional[str] = None
+    transmission: Optional[str] = None
+    
+    @classmethod
+    def from_record(cls, record):
+        """Build preferences from a Cars sheet row, as returned by get_car_preferences."""
+        return cls(
+            make=record['make'],
+            model=record['model'],
+            year_range=f"{record['min_year']}-{record['max_year']}",
+            min_year=record['min_year'],
+            max_year=record['max_year'],
+            price_range=f"{record['min_price']}-{record['max_price']}",
+            min_price=record['min_price'],
+            max_price=record['max_price'],
+            location=record['location'],
+            fuel_type=record.get('fuel_type', 'Any'),
+            transmission=record.get('transmission', 'Any')
+        )
+
+# How long a user's car preferences are served from memory before re-reading the sheet
+PREFERENCES_CACHE_TTL = 3600
+
+# Read-through cache of active car preferences, keyed by user ID
+_preferences_cache = TTLCache(maxsize=10000, ttl=PREFERENCES_CACHE_TTL)
+
+# Cars sheet columns the conversation reads back; the rest aren't kept in the cache
+CACHED_PREFERENCE_FIELDS = (
+    'make', 'model', 'min_year', 'max_year', 'min_price', 'max_price',
+    'location', 'fuel_type', 'transmission'
+)
+
+# Seconds of inactivity after which an abandoned /mycars setup is ended and its user_data dropped
+CONVERSATION_TIMEOUT = 600
+
+# user_data keys owned by the /mycars conversation
+SETUP_DATA_KEYS = (
+    'car_preferences', 'setup_step', 'total_steps', 'editing',
+    'edit_index', 'all_preferences', 'delete_preference', 'delete_index'
+)
+
+# Telegram rejects messages over 4096 characters; stay a little under it
+MESSAGE_TEXT_LIMIT = 4000
+
+# Matches a typed "cancel" in any case; routed to the cancel fallback from every step
+CANCEL_PATTERN = re.compile(r'^cancel$', re.IGNORECASE)
+
+# Accepted answers to the Yes/No prompts, compared after strip().casefold()
+YES_ANSWERS = frozenset({'yes', 'y'})
+NO_ANSWERS = frozenset({'no', 'n', 'cancel'})
+
 # Define states for the conversation
 CHOOSE_ACTION, SELECT_PREFERENCE, CONFIRM_DELETE, MAKE, MODEL, YEAR, PRICE, LOCATION, ADVANCED, FUEL, TRANSMISSION, CONFIRM = range(12)
+# Follow-up states for free-text answers after picking 'Other' or 'Custom'
+CUSTOM_MAKE, CUSTOM_YEAR = range(12, 14)
 
 # Common car makes for keyboard suggestions
 CAR_MAKES = [
@@ -54,6 +126,295 @@ TRANSMISSION_OPTIONS = [
     ['Automatic', 'Manual', 'Any']
 ]
 
+# Flattened keyboard options for O(1) membership checks
+MAKE_CHOICES = frozenset(option for row in CAR_MAKES for option in row)
+LOCATION_CHOICES = frozenset(option for row in LOCATIONS for option in row)
+FUEL_CHOICES = frozenset(option for row in FUEL_OPTIONS for option in row)
+TRANSMISSION_CHOICES = frozenset(option for row in TRANSMISSION_OPTIONS for option in row)
+OTHER_LOCATIONS = frozenset(option for row in LOCATIONS for option in row if option.endswith(': Other'))
+
+# Keyboards never change at runtime, so build them once and share them across replies
+KEEP_CURRENT = [['Keep Current']]
+ACTION_KEYBOARD = ReplyKeyboardMarkup([['Set New Car', 'View/Edit Current', 'Cancel']], one_time_keyboard=True)
+YES_NO_KEYBOARD = ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
+DELETE_KEYBOARD = ReplyKeyboardMarkup([['Yes, Delete It', 'No, Keep It']], one_time_keyboard=True)
+KEEP_CURRENT_KEYBOARD = ReplyKeyboardMarkup(KEEP_CURRENT, one_time_keyboard=True)
+MAKES_KEYBOARD = ReplyKeyboardMarkup(CAR_MAKES, one_time_keyboard=True)
+MAKES_EDIT_KEYBOARD = ReplyKeyboardMarkup(CAR_MAKES + KEEP_CURRENT, one_time_keyboard=True)
+YEAR_KEYBOARD = ReplyKeyboardMarkup(YEAR_OPTIONS, one_time_keyboard=True)
+YEAR_EDIT_KEYBOARD = ReplyKeyboardMarkup(YEAR_OPTIONS + KEEP_CURRENT, one_time_keyboard=True)
+PRICE_KEYBOARD = ReplyKeyboardMarkup(PRICE_OPTIONS, one_time_keyboard=True)
+PRICE_EDIT_KEYBOARD = ReplyKeyboardMarkup(PRICE_OPTIONS + KEEP_CURRENT, one_time_keyboard=True)
+LOCATION_KEYBOARD = ReplyKeyboardMarkup(LOCATIONS, one_time_keyboard=True)
+LOCATION_EDIT_KEYBOARD = ReplyKeyboardMarkup(LOCATIONS + KEEP_CURRENT, one_time_keyboard=True)
+FUEL_KEYBOARD = ReplyKeyboardMarkup(FUEL_OPTIONS, one_time_keyboard=True)
+FUEL_EDIT_KEYBOARD = ReplyKeyboardMarkup(FUEL_OPTIONS + KEEP_CURRENT, one_time_keyboard=True)
+TRANSMISSION_KEYBOARD = ReplyKeyboardMarkup(TRANSMISSION_OPTIONS, one_time_keyboard=True)
+TRANSMISSION_EDIT_KEYBOARD = ReplyKeyboardMarkup(TRANSMISSION_OPTIONS + KEEP_CURRENT, one_time_keyboard=True)
+REMOVE_KEYBOARD = ReplyKeyboardRemove()
+
+# Message templates, parsed once and filled with str.format_map
+SUMMARY_TEMPLATE = (
+    "*Preference Summary*\n"
+    "───────────────────────\n"
+    "*Make:* {make}\n"
+    "*Model:* {model}\n"
+    "*Year Range:* {year_range}\n"
+    "*Price Range:* {price_range}\n"
+    "*Location:* {location}\n"
+    "*Fuel Type:* {fuel_type}\n"
+    "*Transmission:* {transmission}\n"
+    "───────────────────────\n\nIs this correct?"
+)
+PREFERENCE_CARD_TEMPLATE = (
+    "*Preference #{number}*\n"
+    "───────────────────────\n"
+    "*Make:* {make}\n"
+    "*Model:* {model}\n"
+    "*Year Range:* {min_year} to {max_year}\n"
+    "*Price Range:* {min_price} to {max_price}\n"
+    "*Location:* {location}\n"
+    "*Fuel Type:* {fuel_type}\n"
+    "*Transmission:* {transmission}\n"
+    "───────────────────────"
+)
+
+@dataclass(frozen=True, slots=True)
+class StepPrompt:
+    """How to ask for one step of the setup, for new preferences and for edits."""
+    number: int
+    title: str
+    question: str
+    edit_question: str
+    keyboard: Optional[ReplyKeyboardMarkup]
+    edit_keyboard: ReplyKeyboardMarkup
+
+# Prompt for each setup step, keyed by conversation state; questions are
+# format_map templates over the CarPreferences fields
+STEP_PROMPTS = {
+    MODEL: StepPrompt(
+        2, "Car Model",
+        "You selected {make}. What model are you interested in?",
+        "Current model: {model}\n\nEnter a new model for {make} or keep the current one:",
+        None, KEEP_CURRENT_KEYBOARD
+    ),
+    YEAR: StepPrompt(
+        3, "Year Range",
+        "What year range are you interested in?",
+        "Current year range: {min_year} to {max_year}\n\nSelect a new year range or keep the current one:",
+        YEAR_KEYBOARD, YEAR_EDIT_KEYBOARD
+    ),
+    PRICE: StepPrompt(
+        4, "Price Range",
+        "Looking for cars from {year_range}. What price range are you interested in?",
+        "Current price range: {min_price} to {max_price}\n\nSelect a new price range or keep the current one:",
+        PRICE_KEYBOARD, PRICE_EDIT_KEYBOARD
+    ),
+    LOCATION: StepPrompt(
+        5, "Location",
+        "Which location are you interested in?",
+        "Current location: {location}\n\nSelect a new location or keep the current one:",
+        LOCATION_KEYBOARD, LOCATION_EDIT_KEYBOARD
+    ),
+    FUEL: StepPrompt(
+        6, "Fuel Type",
+        "What fuel type are you interested in?",
+        "Current fuel type: {fuel_type}\n\nSelect a new fuel type or keep the current one:",
+        FUEL_KEYBOARD, FUEL_EDIT_KEYBOARD
+    ),
+    TRANSMISSION: StepPrompt(
+        7, "Transmission",
+        "What transmission type are you interested in?",
+        "Current transmission: {transmission}\n\nSelect a new transmission type or keep the current one:",
+        TRANSMISSION_KEYBOARD, TRANSMISSION_EDIT_KEYBOARD
+    ),
+}
+
+# A year range such as '2015-2020' or '2020-Present', or a single year such as '2017'
+YEAR_RANGE_PATTERN = re.compile(r'^\s*(\d{4})\s*(?:-\s*(\d{4}|Present)\s*)?$', re.IGNORECASE)
+
+def _parse_year_option(text):
+    """Parse a year range like '2015-2020', '2020-Present' or '2017' into (min_year, max_year).
+    
+    max_year is None for an open-ended 'Present' range; resolve it with _current_year()
+    when the answer is saved. Returns None if the text isn't a year range.
+    """
+    match = YEAR_RANGE_PATTERN.match(text)
+    if match is None:
+        return None
+    min_year, max_year = match.groups()
+    if max_year is None:
+        return int(min_year), int(min_year)
+    if max_year.lower() == 'present':
+        return int(min_year), None
+    return int(min_year), int(max_year)
+
+def _current_year():
+    """Return the year 'Present' stands for, read at save time so it rolls over on 1 January."""
+    return date.today().year
+
+# Strips currency symbols, thousands separators and spaces from a price in one pass
+_PRICE_STRIP = str.maketrans('', '', ',€£ ')
+
+def _parse_price_option(text):
+    """Parse a price range like '€15,000-20,000' or '€30,000+' into (min_price, max_price).
+    
+    Returns None if the text isn't a price range.
+    """
+    price_parts = text.translate(_PRICE_STRIP)
+    if price_parts.endswith('+'):
+        # Handle format like "€30,000+"
+        min_price, max_price = price_parts[:-1], '9999999'
+    else:
+        # Handle format like "€15,000-20,000"
+        min_price, _, max_price = price_parts.partition('-')
+    # isdecimal() guarantees int() can't raise, so bad input needs no exception handling
+    if not (min_price.isdecimal() and max_price.isdecimal()):
+        return None
+    return int(min_price), int(max_price)
+
+# Keyboard presets parsed once at import, keyed by their button label; 'Present' stays None
+YEAR_RANGES = {
+    option: _parse_year_option(option)
+    for row in YEAR_OPTIONS for option in row if option != 'Custom'
+}
+PRICE_RANGES = {
+    option: _parse_price_option(option)
+    for row in PRICE_OPTIONS for option in row
+}
+
+def _markdown_fields(fields):
+    """Escape the text values of template fields so typed answers can't break Markdown parsing."""
+    return {
+        name: escape_markdown(value) if isinstance(value, str) else value
+        for name, value in fields.items()
+    }
+
+def _summary_fields(prefs):
+    """Map CarPreferences onto SUMMARY_TEMPLATE fields, filling gaps with 'Not specified'."""
+    return _markdown_fields({name: value or 'Not specified' for name, value in asdict(prefs).items()})
+
+def _compact_preference(row):
+    """Keep only the CACHED_PREFERENCE_FIELDS of a Cars sheet row."""
+    return {field: row[field] for field in CACHED_PREFERENCE_FIELDS if field in row}
+
+async def get_cached_preferences(sheets_manager, user_id):
+    """Get a user's active car preferences, reading the sheet only on a cache miss.
+    
+    Args:
+        sheets_manager: SheetsManager instance
+        user_id: Telegram user ID
+        
+    Returns:
+        list: List of dictionaries containing car preferences
+    """
+    preferences = _preferences_cache.get(user_id)
+    if preferences is None:
+        # The Sheets client is synchronous; keep it off the event loop
+        preferences = await asyncio.to_thread(sheets_manager.get_car_preferences, user_id)
+        preferences = [_compact_preference(row) for row in preferences]
+        # An empty list may also mean the sheet read failed, so don't pin it
+        if preferences:
+            _preferences_cache[user_id] = preferences
+    return preferences
+
+def update_cached_preferences(user_id, preference, replaced=None):
+    """Write a newly saved car preference through to the cache.
+    
+    Users with nothing cached are left alone; their next read goes to the sheet.
+    
+    Args:
+        user_id: Telegram user ID
+        preference: Dictionary of the preference that was just saved
+        replaced: Previous preference that was set inactive by the save (optional)
+    """
+    preferences = _preferences_cache.get(user_id)
+    if preferences is None:
+        return
+    preferences = list(preferences)
+    if replaced is not None:
+        # Mirror set_preference_inactive, which retires the first active make/model match
+        for idx, pref in enumerate(preferences):
+            if pref['make'] == replaced['make'] and pref['model'] == replaced['model']:
+                del preferences[idx]
+                break
+    preferences.append(_compact_preference(preference))
+    _preferences_cache[user_id] = preferences
+
+def invalidate_cached_preferences(user_id):
+    """Drop a user's cached car preferences after they have been changed."""
+    _preferences_cache.pop(user_id, None)
+
+def _preference_card_messages(preferences):
+    """Group preference cards into as few messages as fit Telegram's length limit.
+    
+    Returns:
+        list: (text, reply_markup) pairs, where the markup has an Edit/Delete row
+            for every card in that message
+    """
+    messages = []
+    cards, buttons, length = [], [], 0
+    for i, car in enumerate(preferences, 1):
+        # Create a nicely formatted card for each preference
+        card = PREFERENCE_CARD_TEMPLATE.format_map(
+            _markdown_fields({'fuel_type': 'Any', 'transmission': 'Any', **car, 'number': i})
+        )
+        if cards and length + len(card) > MESSAGE_TEXT_LIMIT:
+            messages.append(("\n\n".join(cards), InlineKeyboardMarkup(buttons)))
+            cards, buttons, length = [], [], 0
+        cards.append(card)
+        buttons.append([
+            InlineKeyboardButton(f"Edit #{i}", callback_data=f"edit_{i-1}"),
+            InlineKeyboardButton(f"Delete #{i}", callback_data=f"delete_{i-1}")
+        ])
+        length += len(card) + 2
+    if cards:
+        messages.append(("\n\n".join(cards), InlineKeyboardMarkup(buttons)))
+    return messages
+
+async def _ask_confirm(update, prefs):
+    """Show the preference summary card and ask the user to confirm it."""
+    await update.message.reply_text(
+        SUMMARY_TEMPLATE.format_map(_summary_fields(prefs)),
+        parse_mode="MARKDOWN",
+        reply_markup=YES_NO_KEYBOARD
+    )
+    return CONFIRM
+
+def _clear_setup_data(user_data):
+    """Drop the /mycars conversation's keys, leaving the rest of user_data alone."""
+    for key in SETUP_DATA_KEYS:
+        user_data.pop(key, None)
+
+async def _cancel_reply(update):
+    """Tell the user setup was cancelled and end the conversation."""
+    await update.message.reply_text(
+        "Car preference setup cancelled. You can restart anytime with /mycars.",
+        reply_markup=REMOVE_KEYBOARD
+    )
+    return ConversationHandler.END
+
+async def _ask_step(update, context, state):
+    """Prompt for the given setup step and return it as the next conversation state."""
+    prompt = STEP_PROMPTS[state]
+    prefs = context.user_data['car_preferences']
+    editing = context.user_data.get('editing')
+    
+    fields = asdict(prefs)
+    fields['fuel_type'] = prefs.fuel_type or 'Any'
+    fields['transmission'] = prefs.transmission or 'Any'
+    fields = _markdown_fields(fields)
+    
+    context.user_data['setup_step'] = prompt.number
+    await update.message.reply_text(
+        "*AutoSniper Car Preferences Setup*\n\n"
+        f"Step {prompt.number}/{context.user_data['total_steps']}: {prompt.title}\n\n"
+        + (prompt.edit_question if editing else prompt.question).format_map(fields),
+        parse_mode="MARKDOWN",
+        reply_markup=prompt.edit_keyboard if editing else prompt.keyboard
+    )
+    return state
+
 async def start_car_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start the car preferences conversation."""
     user = update.effective_user
@@ -68,20 +429,21 @@ async def start_car_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # Get existing car preferences for this user
     sheets_manager = context.bot_data['sheets_manager']
-    existing_preferences = sheets_manager.get_car_preferences(user.id)
+    existing_preferences = await get_cached_preferences(sheets_manager, user.id)
     
     # Always show the action menu first
     active_count = len(existing_preferences)
     if active_count > 0:
-        reply_keyboard = [['Set New Car', 'View/Edit Current', 'Cancel']]
+        # Keep the list for choose_action so View/Edit shows exactly what was counted here
+        context.user_data['all_preferences'] = existing_preferences
         await update.message.reply_text(
             f"You currently have {active_count} active car preference{'s' if active_count > 1 else ''}. What would you like to do?",
-            reply_markup=ReplyKeyboardMarkup(reply_keyboard, one_time_keyboard=True)
+            reply_markup=ACTION_KEYBOARD
         )
         return CHOOSE_ACTION
     else:
         # Initialize user data in context for new users
-        context.user_data['car_preferences'] = {}
+        context.user_data['car_preferences'] = CarPreferences()
         context.user_data['setup_step'] = 1
         context.user_data['total_steps'] = 5
         
@@ -91,7 +453,7 @@ async def start_car_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             f"Step 1/{context.user_data['total_steps']}: Car Make\n\n"
             "Let's set up your car preferences. What make of car are you interested in?",
             parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(CAR_MAKES, one_time_keyboard=True)
+            reply_markup=MAKES_KEYBOARD
         )
         return MAKE
 
@@ -100,8 +462,11 @@ async def choose_action(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     choice = update.message.text
     
     if choice == 'Set New Car':
+        # The list fetched by start_car_setup isn't needed for a new preference
+        context.user_data.pop('all_preferences', None)
+        
         # Initialize user data in context
-        context.user_data['car_preferences'] = {}
+        context.user_data['car_preferences'] = CarPreferences()
         context.user_data['setup_step'] = 1
         context.user_data['total_steps'] = 5
         context.user_data['editing'] = False
@@ -111,59 +476,39 @@ async def choose_action(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
             f"Step 1/{context.user_data['total_steps']}: Car Make\n\n"
             "What make of car are you interested in?",
             parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(CAR_MAKES, one_time_keyboard=True)
+            reply_markup=MAKES_KEYBOARD
         )
         return MAKE
     
     elif choice == 'View/Edit Current':
-        # Get user's current preferences and display them with edit/delete options
-        sheets_manager = context.bot_data['sheets_manager']
-        preferences = sheets_manager.get_car_preferences(update.effective_user.id)
+        # Get user's current preferences and display them with edit/delete options,
+        # reusing the list start_car_setup just fetched when it's still there
+        preferences = context.user_data.get('all_preferences')
+        if preferences is None:
+            sheets_manager = context.bot_data['sheets_manager']
+            preferences = await get_cached_preferences(sheets_manager, update.effective_user.id)
         
         if preferences:
             await update.message.reply_text(
                 "*Your Current Car Preferences*\n"
                 "Select a preference to edit or delete it:",
                 parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=REMOVE_KEYBOARD
             )
             
             # Store preferences in context for later reference
             context.user_data['all_preferences'] = preferences
             
-            for i, car in enumerate(preferences, 1):
-                # Create a nicely formatted card for each preference
-                fuel_type = car.get('fuel_type', 'Any')
-                transmission = car.get('transmission', 'Any')
-                
-                # Create inline keyboard with Edit and Delete buttons
-                keyboard = [
-                    [
-                        InlineKeyboardButton("Edit", callback_data=f"edit_{i-1}"),
-                        InlineKeyboardButton("Delete", callback_data=f"delete_{i-1}")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                await update.message.reply_text(
-                    f"*Preference #{i}*\n"
-                    "───────────────────────\n"
-                    f"*Make:* {car['make']}\n"
-                    f"*Model:* {car['model']}\n"
-                    f"*Year Range:* {car['min_year']} to {car['max_year']}\n"
-                    f"*Price Range:* {car['min_price']} to {car['max_price']}\n"
-                    f"*Location:* {car['location']}\n"
-                    f"*Fuel Type:* {fuel_type}\n"
-                    f"*Transmission:* {transmission}\n"
-                    "───────────────────────",
-                    parse_mode="MARKDOWN",
-                    reply_markup=reply_markup
-                )
+            # Usually a single message; each card is numbered so arrival order doesn't matter
+            await asyncio.gather(*(
+                update.message.reply_text(text, parse_mode="MARKDOWN", reply_markup=reply_markup)
+                for text, reply_markup in _preference_card_messages(preferences)
+            ))
             
             return SELECT_PREFERENCE
         else:
             # Initialize user data in context since user has no preferences
-            context.user_data['car_preferences'] = {}
+            context.user_data['car_preferences'] = CarPreferences()
             context.user_data['setup_step'] = 1
             context.user_data['total_steps'] = 5
             
@@ -173,22 +518,23 @@ async def choose_action(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
                 f"Step 1/{context.user_data['total_steps']}: Car Make\n\n"
                 "What make of car are you interested in?",
                 parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup(CAR_MAKES, one_time_keyboard=True)
+                reply_markup=MAKES_KEYBOARD
             )
             return MAKE
     
     elif choice == 'Cancel':
+        context.user_data.pop('all_preferences', None)
         await update.message.reply_text(
             "Alright, we'll keep your existing preferences. You can use /mycars "
             "anytime to view or update them.",
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=REMOVE_KEYBOARD
         )
         return ConversationHandler.END
     
     else:
         await update.message.reply_text(
             "I didn't understand that choice. Please select one of the options below.",
-            reply_markup=ReplyKeyboardMarkup([['Set New Car', 'View/Edit Current', 'Cancel']], one_time_keyboard=True)
+            reply_markup=ACTION_KEYBOARD
         )
         return CHOOSE_ACTION
 
@@ -198,16 +544,18 @@ async def select_preference(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
     
     data = query.data
+    # Button data is 'edit_<index>' or 'delete_<index>'
+    action, _, index = data.partition('_')
     
-    if data.startswith('edit_'):
+    if action == 'edit' and index.isdecimal():
         # Extract the preference index
-        idx = int(data.split('_')[1])
+        idx = int(index)
         preferences = context.user_data.get('all_preferences', [])
         
         if idx < len(preferences):
             # Store the preference for editing
             pref = preferences[idx]
-            context.user_data['car_preferences'] = pref.copy()
+            context.user_data['car_preferences'] = CarPreferences.from_record(pref)
             context.user_data['editing'] = True
             context.user_data['edit_index'] = idx
             context.user_data['setup_step'] = 1
@@ -217,22 +565,22 @@ async def select_preference(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await query.message.reply_text(
                 "*Edit Car Preference*\n\n"
                 f"Step 1/{context.user_data['total_steps']}: Car Make\n\n"
-                f"Current make: {pref['make']}\n\n"
+                f"Current make: {escape_markdown(str(pref['make']))}\n\n"
                 "Select a new make or use the current one:",
                 parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup(CAR_MAKES + [['Keep Current']], one_time_keyboard=True)
+                reply_markup=MAKES_EDIT_KEYBOARD
             )
             return MAKE
         else:
             await query.message.reply_text(
                 "Sorry, that preference was not found. Please try again.",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=REMOVE_KEYBOARD
             )
             return ConversationHandler.END
     
-    elif data.startswith('delete_'):
+    elif action == 'delete' and index.isdecimal():
         # Extract the preference index
-        idx = int(data.split('_')[1])
+        idx = int(index)
         preferences = context.user_data.get('all_preferences', [])
         
         if idx < len(preferences):
@@ -247,20 +595,20 @@ async def select_preference(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 f"Make: {pref['make']}\n"
                 f"Model: {pref['model']}\n\n"
                 f"This action cannot be undone.",
-                reply_markup=ReplyKeyboardMarkup([['Yes, Delete It', 'No, Keep It']], one_time_keyboard=True)
+                reply_markup=DELETE_KEYBOARD
             )
             return CONFIRM_DELETE
         else:
             await query.message.reply_text(
                 "Sorry, that preference was not found. Please try again.",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=REMOVE_KEYBOARD
             )
             return ConversationHandler.END
     
     else:
         await query.message.reply_text(
             "Sorry, I didn't understand that selection. Please try again using /mycars.",
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=REMOVE_KEYBOARD
         )
         return ConversationHandler.END
 
@@ -273,60 +621,53 @@ async def confirm_delete(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         pref = context.user_data.get('delete_preference')
         
         if pref:
-            # Delete the preference
-            sheets_manager = context.bot_data['sheets_manager']
-            success = sheets_manager.set_preference_inactive(
-                user_id=update.effective_user.id,
+            user_id = update.effective_user.id
+            success = await asyncio.to_thread(
+                context.bot_data['sheets_manager'].set_preference_inactive,
+                user_id=user_id,
                 make=pref['make'],
                 model=pref['model']
             )
             
             if success:
+                # The cached list still has the deleted row
+                invalidate_cached_preferences(user_id)
                 await update.message.reply_text(
                     "Car preference deleted successfully!",
-                    reply_markup=ReplyKeyboardRemove()
+                    reply_markup=REMOVE_KEYBOARD
                 )
             else:
+                logger.error("Failed to delete car preference %s %s for user %s", pref['make'], pref['model'], user_id)
                 await update.message.reply_text(
-                    "There was an error deleting your preference. Please try again later.",
-                    reply_markup=ReplyKeyboardRemove()
+                    "Sorry, there was an error deleting your car preference. Please try again later.",
+                    reply_markup=REMOVE_KEYBOARD
                 )
         else:
             await update.message.reply_text(
                 "Sorry, I couldn't find the preference to delete. Please try again.",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=REMOVE_KEYBOARD
             )
         
         # Clear relevant user data
-        if 'delete_preference' in context.user_data:
-            del context.user_data['delete_preference']
-        if 'delete_index' in context.user_data:
-            del context.user_data['delete_index']
-        if 'all_preferences' in context.user_data:
-            del context.user_data['all_preferences']
+        _clear_setup_data(context.user_data)
         
         return ConversationHandler.END
     
     elif text == 'No, Keep It':
         await update.message.reply_text(
             "Deletion cancelled. Your car preference will be kept.",
-            reply_markup=ReplyKeyboardRemove()
+            reply_markup=REMOVE_KEYBOARD
         )
         
         # Clear relevant user data
-        if 'delete_preference' in context.user_data:
-            del context.user_data['delete_preference']
-        if 'delete_index' in context.user_data:
-            del context.user_data['delete_index']
-        if 'all_preferences' in context.user_data:
-            del context.user_data['all_preferences']
+        _clear_setup_data(context.user_data)
         
         return ConversationHandler.END
     
     else:
         await update.message.reply_text(
             "I didn't understand that response. Please select one of the options below.",
-            reply_markup=ReplyKeyboardMarkup([['Yes, Delete It', 'No, Keep It']], one_time_keyboard=True)
+            reply_markup=DELETE_KEYBOARD
         )
         return CONFIRM_DELETE
 
@@ -334,176 +675,71 @@ async def car_make(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle car make selection."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
-    
     # Check if user wants to keep current make when editing
     if text == 'Keep Current' and context.user_data.get('editing'):
         # Skip to model with current make
-        make = context.user_data['car_preferences']['make']
-        
-        # Increment step counter
-        context.user_data['setup_step'] = 2
-        
-        # Now ask for model
-        current_model = context.user_data['car_preferences']['model']
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 2/{context.user_data['total_steps']}: Car Model\n\n"
-            f"Current model: {current_model}\n\n"
-            f"Enter a new model for {make} or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup([['Keep Current']], one_time_keyboard=True)
-        )
-        return MODEL
-    
-    # Save the car make
-    context.user_data['car_preferences']['make'] = text
+        return await _ask_step(update, context, MODEL)
     
     if text == 'Other':
         await update.message.reply_text(
             "*AutoSniper Car Preferences Setup*\n\n"
             f"Step 1/{context.user_data['total_steps']}: Car Make\n\n"
-            "Please specify the make of car you're interested in:",
+            "Please type the make and model you're interested in, separated by a comma "
+            "(e.g., 'Skoda, Octavia'):",
             parse_mode="MARKDOWN"
         )
-        return MODEL
+        return CUSTOM_MAKE
     
-    # Increment step counter
+    # Save the car make and ask for model; preset makes share one interned string across users
+    context.user_data['car_preferences'].make = sys.intern(text) if text in MAKE_CHOICES else text
+    return await _ask_step(update, context, MODEL)
+
+async def custom_car_make(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle a typed car make, or "Make, Model", after selecting Other."""
+    text = update.message.text
+    
+    make, _, model = text.partition(',')
+    make, model = make.strip(), model.strip()
+    prefs = context.user_data['car_preferences']
+    
+    # Both given in one message: skip the separate model question
+    if make and model:
+        prefs.make = make
+        prefs.model = model
+        return await _ask_step(update, context, YEAR)
+    
+    # Only a make was typed, so ask for the model as before
+    text = make or text
+    prefs.make = text
     context.user_data['setup_step'] = 2
     
-    # Now ask for model
-    if context.user_data.get('editing'):
-        current_model = context.user_data['car_preferences']['model']
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 2/{context.user_data['total_steps']}: Car Model\n\n"
-            f"Current model: {current_model}\n\n"
-            f"Enter a new model for {text} or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup([['Keep Current']], one_time_keyboard=True)
-        )
-    else:
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 2/{context.user_data['total_steps']}: Car Model\n\n"
-            f"You selected {text}. What model are you interested in?",
-            parse_mode="MARKDOWN"
-        )
+    await update.message.reply_text(
+        "*AutoSniper Car Preferences Setup*\n\n"
+        f"Step 2/{context.user_data['total_steps']}: Car Model\n\n"
+        f"What model of {escape_markdown(text)} are you interested in?",
+        parse_mode="MARKDOWN"
+    )
     return MODEL
 
 async def car_model(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle car model input."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
-    
-    # Check if user wants to keep current model when editing
-    if text == 'Keep Current' and context.user_data.get('editing'):
-        # Skip to year with current model
-        
-        # Increment step counter
-        context.user_data['setup_step'] = 3
-        
-        # Now ask for year range
-        current_min = context.user_data['car_preferences']['min_year']
-        current_max = context.user_data['car_preferences']['max_year']
-        current_range = f"{current_min} to {current_max}"
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 3/{context.user_data['total_steps']}: Year Range\n\n"
-            f"Current year range: {current_range}\n\n"
-            "Select a new year range or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(YEAR_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-        return YEAR
-    
-    # If the user typed 'Other' for make, now we capture the actual make
-    if context.user_data['car_preferences'].get('make') == 'Other':
-        context.user_data['car_preferences']['make'] = text
-        context.user_data['setup_step'] = 2
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 2/{context.user_data['total_steps']}: Car Model\n\n"
-            f"What model of {text} are you interested in?",
-            parse_mode="MARKDOWN"
-        )
-        return MODEL
-    
-    # Save the car model
-    context.user_data['car_preferences']['model'] = text
-    
-    # Increment step counter
-    context.user_data['setup_step'] = 3
+    # Save the car model unless the user is keeping the current one
+    if not (text == 'Keep Current' and context.user_data.get('editing')):
+        context.user_data['car_preferences'].model = text
     
     # Now ask for year range
-    if context.user_data.get('editing'):
-        current_min = context.user_data['car_preferences']['min_year']
-        current_max = context.user_data['car_preferences']['max_year']
-        current_range = f"{current_min} to {current_max}"
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 3/{context.user_data['total_steps']}: Year Range\n\n"
-            f"Current year range: {current_range}\n\n"
-            "Select a new year range or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(YEAR_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-    else:
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 3/{context.user_data['total_steps']}: Year Range\n\n"
-            "What year range are you interested in?",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(YEAR_OPTIONS, one_time_keyboard=True)
-        )
-    return YEAR
+    return await _ask_step(update, context, YEAR)
 
 async def year_range(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle year range input."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
-    
     # Check if user wants to keep current year range when editing
     if text == 'Keep Current' and context.user_data.get('editing'):
         # Skip to price with current year range
-        
-        # Increment step counter
-        context.user_data['setup_step'] = 4
-        
-        # Now ask for price range
-        current_min = context.user_data['car_preferences']['min_price']
-        current_max = context.user_data['car_preferences']['max_price']
-        current_range = f"{current_min} to {current_max}"
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 4/{context.user_data['total_steps']}: Price Range\n\n"
-            f"Current price range: {current_range}\n\n"
-            "Select a new price range or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(PRICE_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-        return PRICE
+        return await _ask_step(update, context, PRICE)
     
     # Parse the year range
     if text == 'Custom':
@@ -514,632 +750,362 @@ async def year_range(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
             "Or simply enter a single year (e.g., '2017') if you're looking for a specific year.",
             parse_mode="MARKDOWN"
         )
-        # Return to the same state to get the custom input
-        return YEAR
-    
-    # Check if this is a custom year input (after selecting Custom)
-    if 'car_preferences' in context.user_data and 'year_range' not in context.user_data['car_preferences']:
-        try:
-            # Try to parse as a range (e.g., "2015-2020")
-            if '-' in text:
-                year_parts = text.split('-')
-                min_year = int(year_parts[0].strip())
-                max_year = int(year_parts[1].strip())
-                year_text = f"{min_year}-{max_year}"
-            else:
-                # Try to parse as a single year (e.g., "2017")
-                year = int(text.strip())
-                min_year = year
-                max_year = year
-                year_text = f"{year}"
-                
-            # Save to context
-            context.user_data['car_preferences']['year_range'] = year_text
-            context.user_data['car_preferences']['min_year'] = min_year
-            context.user_data['car_preferences']['max_year'] = max_year
-            
-            # Increment step counter
-            context.user_data['setup_step'] = 4
-            
-            # Move to price range
-            if context.user_data.get('editing'):
-                current_min = context.user_data['car_preferences']['min_price']
-                current_max = context.user_data['car_preferences']['max_price']
-                current_range = f"{current_min} to {current_max}"
-                
-                await update.message.reply_text(
-                    "*AutoSniper Car Preferences Setup*\n\n"
-                    f"Step 4/{context.user_data['total_steps']}: Price Range\n\n"
-                    f"Current price range: {current_range}\n\n"
-                    "Select a new price range or keep the current one:",
-                    parse_mode="MARKDOWN",
-                    reply_markup=ReplyKeyboardMarkup(PRICE_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-                )
-            else:
-                await update.message.reply_text(
-                    "*AutoSniper Car Preferences Setup*\n\n"
-                    f"Step 4/{context.user_data['total_steps']}: Price Range\n\n"
-                    f"Looking for cars from {year_text}. What price range are you interested in?",
-                    parse_mode="MARKDOWN",
-                    reply_markup=ReplyKeyboardMarkup(PRICE_OPTIONS, one_time_keyboard=True)
-                )
-            return PRICE
-        except ValueError:
-            # Not a valid year format
-            await update.message.reply_text(
-                "*AutoSniper Car Preferences Setup*\n\n"
-                f"Step 3/{context.user_data['total_steps']}: Year Range\n\n"
-                "That doesn't seem to be a valid year or year range. "
-                "Please enter a year (e.g., '2017') or year range (e.g., '2015-2020'):",
-                parse_mode="MARKDOWN"
-            )
-            return YEAR
+        return CUSTOM_YEAR
     
-    # Save the year range for preset options
-    context.user_data['car_preferences']['year_range'] = text
+    # Anything other than a preset button is a typed year range
+    if text not in YEAR_RANGES:
+        return await custom_year_range(update, context)
     
-    # Also parse and save min_year and max_year for preset options
-    if 'Present' in text:
-        year_parts = text.split('-')
-        min_year = int(year_parts[0])
-        max_year = 2025  # Current year as "Present"
-    else:
-        year_parts = text.split('-')
-        min_year = int(year_parts[0])
-        max_year = int(year_parts[1])
-    
-    context.user_data['car_preferences']['min_year'] = min_year
-    context.user_data['car_preferences']['max_year'] = max_year
-    
-    # Increment step counter
-    context.user_data['setup_step'] = 4
+    # Save the year range and its parsed bounds for preset options
+    prefs = context.user_data['car_preferences']
+    prefs.year_range = text
+    min_year, max_year = YEAR_RANGES[text]
+    prefs.min_year, prefs.max_year = min_year, max_year or _current_year()
     
     # Move to price range
-    if context.user_data.get('editing'):
-        current_min = context.user_data['car_preferences']['min_price']
-        current_max = context.user_data['car_preferences']['max_price']
-        current_range = f"{current_min} to {current_max}"
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 4/{context.user_data['total_steps']}: Price Range\n\n"
-            f"Current price range: {current_range}\n\n"
-            "Select a new price range or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(PRICE_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-    else:
+    return await _ask_step(update, context, PRICE)
+
+async def custom_year_range(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle a typed year range (after selecting Custom)."""
+    text = update.message.text
+    
+    # Accept a range (e.g., "2015-2020") or a single year (e.g., "2017")
+    years = _parse_year_option(text)
+    if years is None:
+        # Not a valid year format
         await update.message.reply_text(
             "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 4/{context.user_data['total_steps']}: Price Range\n\n"
-            f"Looking for cars from {text}. What price range are you interested in?",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(PRICE_OPTIONS, one_time_keyboard=True)
+            f"Step 3/{context.user_data['total_steps']}: Year Range\n\n"
+            "That doesn't seem to be a valid year or year range. "
+            "Please enter a year (e.g., '2017') or year range (e.g., '2015-2020'):",
+            parse_mode="MARKDOWN"
         )
-    return PRICE
+        return CUSTOM_YEAR
+    
+    min_year, max_year = years
+    max_year = max_year or _current_year()
+    
+    # Save to context
+    prefs = context.user_data['car_preferences']
+    prefs.year_range = f"{min_year}-{max_year}" if min_year != max_year else f"{min_year}"
+    prefs.min_year = min_year
+    prefs.max_year = max_year
+    
+    # Move to price range
+    return await _ask_step(update, context, PRICE)
 
 async def price_range(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle price range input."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
-    
     # Check if user wants to keep current price range when editing
     if text == 'Keep Current' and context.user_data.get('editing'):
         # Skip to location with current price range
-        
-        # Increment step counter
-        context.user_data['setup_step'] = 5
-        
-        # Now ask for location
-        current_location = context.user_data['car_preferences']['location']
-        
+        return await _ask_step(update, context, LOCATION)
+    
+    # Preset buttons were parsed at import; only typed ranges are parsed here
+    price = PRICE_RANGES.get(text) or _parse_price_option(text)
+    if price is None:
         await update.message.reply_text(
             "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 5/{context.user_data['total_steps']}: Location\n\n"
-            f"Current location: {current_location}\n\n"
-            "Select a new location or keep the current one:",
+            f"Step 4/{context.user_data['total_steps']}: Price Range\n\n"
+            "That doesn't seem to be a valid price range. "
+            "Please pick one of the options or enter a range (e.g., '€15,000-20,000'):",
             parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(LOCATIONS + [['Keep Current']], one_time_keyboard=True)
+            reply_markup=PRICE_EDIT_KEYBOARD if context.user_data.get('editing') else PRICE_KEYBOARD
         )
-        return LOCATION
+        return PRICE
     
     # Save the price range
-    context.user_data['car_preferences']['price_range'] = text
-    
-    # Parse the price range
-    if '+' in text:
-        # Handle format like "€30,000+"
-        price_parts = text.replace(',', '').replace('€', '').replace('£', '')
-        price_parts = price_parts.split('+')[0]
-        min_price = int(price_parts)
-        max_price = 9999999
-    else:
-        # Handle format like "€15,000-20,000"
-        price_parts = text.replace(',', '').replace('€', '').replace('£', '')
-        price_parts = price_parts.split('-')
-        min_price = int(price_parts[0])
-        max_price = int(price_parts[1])
-    
-    context.user_data['car_preferences']['min_price'] = min_price
-    context.user_data['car_preferences']['max_price'] = max_price
-    
-    # Increment step counter
-    context.user_data['setup_step'] = 5
+    prefs = context.user_data['car_preferences']
+    prefs.price_range = text
+    prefs.min_price, prefs.max_price = price
     
     # Move to location
-    if context.user_data.get('editing'):
-        current_location = context.user_data['car_preferences']['location']
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 5/{context.user_data['total_steps']}: Location\n\n"
-            f"Current location: {current_location}\n\n"
-            "Select a new location or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(LOCATIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-    else:
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 5/{context.user_data['total_steps']}: Location\n\n"
-            "Which location are you interested in?",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(LOCATIONS, one_time_keyboard=True)
-        )
-    return LOCATION
+    return await _ask_step(update, context, LOCATION)
 
 async def location(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle location input."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
+    user_data = context.user_data
+    prefs = user_data['car_preferences']
+    editing = user_data.get('editing')
     
-    # Check if user wants to keep current location when editing
-    if text == 'Keep Current' and context.user_data.get('editing'):
-        # Skip to advanced options with current location
-        
-        # Ask if user wants to set advanced options
-        if 'total_steps' in context.user_data and context.user_data['total_steps'] == 5:
-            # If we haven't already included advanced steps, ask if user wants them
-            current_fuel = context.user_data['car_preferences'].get('fuel_type', 'Any')
-            current_trans = context.user_data['car_preferences'].get('transmission', 'Any')
-            
+    # Keep the current location when editing; otherwise take the new one
+    if not (text == 'Keep Current' and editing):
+        # Check if user selected an "Other" location option
+        if text in OTHER_LOCATIONS:
+            country = text.split(':')[0]  # Extract country part (Ireland or UK)
             await update.message.reply_text(
                 "*AutoSniper Car Preferences Setup*\n\n"
-                f"Current advanced settings:\n"
-                f"Fuel Type: {current_fuel}\n"
-                f"Transmission: {current_trans}\n\n"
-                "Would you like to edit advanced options?",
-                parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
-            )
-            return ADVANCED
-        else:
-            # If advanced steps are already included, go to confirmation
-            prefs = context.user_data['car_preferences']
-            
-            # Build a nicely formatted summary card
-            summary = (
-                "*Preference Summary*\n"
-                "───────────────────────\n"
-                f"*Make:* {prefs.get('make', 'Not specified')}\n"
-                f"*Model:* {prefs.get('model', 'Not specified')}\n"
-                f"*Year Range:* {prefs.get('year_range', 'Not specified')}\n"
-                f"*Price Range:* {prefs.get('price_range', 'Not specified')}\n"
-                f"*Location:* {prefs.get('location', 'Not specified')}\n"
-            )
-            
-            # Add advanced options if set
-            if 'fuel_type' in prefs:
-                summary += f"*Fuel Type:* {prefs.get('fuel_type')}\n"
-            if 'transmission' in prefs:
-                summary += f"*Transmission:* {prefs.get('transmission')}\n"
-            
-            summary += "───────────────────────\n\nIs this correct?"
-            
-            await update.message.reply_text(
-                summary,
-                parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
+                f"Step 5/{user_data['total_steps']}: Location\n\n"
+                f"Please specify which area in {country} you're interested in:",
+                parse_mode="MARKDOWN"
             )
-            return CONFIRM
-    
-    # Check if user selected an "Other" location option
-    if text == 'Ireland: Other' or text == 'UK: Other':
-        country = text.split(':')[0]  # Extract country part (Ireland or UK)
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 5/{context.user_data['total_steps']}: Location\n\n"
-            f"Please specify which area in {country} you're interested in:",
-            parse_mode="MARKDOWN"
-        )
-        # Stay in the same state to get the specific location
-        return LOCATION
-    
-    # Save the location
-    context.user_data['car_preferences']['location'] = text
+            # Stay in the same state to get the specific location
+            return LOCATION
+        
+        # Save the location
+        prefs.location = sys.intern(text) if text in LOCATION_CHOICES else text
     
     # Ask if user wants to set advanced options
-    if 'total_steps' in context.user_data and context.user_data['total_steps'] == 5:
+    if user_data.get('total_steps') == 5:
         # If we haven't already included advanced steps, ask if user wants them
-        if context.user_data.get('editing'):
-            current_fuel = context.user_data['car_preferences'].get('fuel_type', 'Any')
-            current_trans = context.user_data['car_preferences'].get('transmission', 'Any')
-            
+        if editing:
             await update.message.reply_text(
                 "*AutoSniper Car Preferences Setup*\n\n"
                 f"Current advanced settings:\n"
-                f"Fuel Type: {current_fuel}\n"
-                f"Transmission: {current_trans}\n\n"
+                f"Fuel Type: {prefs.fuel_type or 'Any'}\n"
+                f"Transmission: {prefs.transmission or 'Any'}\n\n"
                 "Would you like to edit advanced options?",
                 parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
+                reply_markup=YES_NO_KEYBOARD
             )
         else:
             await update.message.reply_text(
                 "*AutoSniper Car Preferences Setup*\n\n"
                 "Would you like to set advanced options like fuel type and transmission?",
                 parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
+                reply_markup=YES_NO_KEYBOARD
             )
         return ADVANCED
     else:
         # If advanced steps are already included, go to confirmation
-        prefs = context.user_data['car_preferences']
-        
-        # Build a nicely formatted summary card
-        summary = (
-            "*Preference Summary*\n"
-            "───────────────────────\n"
-            f"*Make:* {prefs.get('make', 'Not specified')}\n"
-            f"*Model:* {prefs.get('model', 'Not specified')}\n"
-            f"*Year Range:* {prefs.get('year_range', 'Not specified')}\n"
-            f"*Price Range:* {prefs.get('price_range', 'Not specified')}\n"
-            f"*Location:* {prefs.get('location', 'Not specified')}\n"
-        )
-        
-        # Add advanced options if set
-        if 'fuel_type' in prefs:
-            summary += f"*Fuel Type:* {prefs.get('fuel_type')}\n"
-        if 'transmission' in prefs:
-            summary += f"*Transmission:* {prefs.get('transmission')}\n"
-        
-        summary += "───────────────────────\n\nIs this correct?"
-        
-        await update.message.reply_text(
-            summary,
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
-        )
-        return CONFIRM
+        return await _ask_confirm(update, prefs)
 
 async def advanced_options(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle advanced options selection."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
-    
-    if text.lower() == 'yes':
-        # Update total steps to include advanced options
+    if text.strip().casefold() in YES_ANSWERS:
+        # Update total steps to include advanced options, then ask for fuel type
         context.user_data['total_steps'] = 7
-        context.user_data['setup_step'] = 6
-        
-        # Ask for fuel type
-        if context.user_data.get('editing'):
-            current_fuel = context.user_data['car_preferences'].get('fuel_type', 'Any')
-            
-            await update.message.reply_text(
-                "*AutoSniper Car Preferences Setup*\n\n"
-                f"Step 6/{context.user_data['total_steps']}: Fuel Type\n\n"
-                f"Current fuel type: {current_fuel}\n\n"
-                "Select a new fuel type or keep the current one:",
-                parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup(FUEL_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-            )
-        else:
-            await update.message.reply_text(
-                "*AutoSniper Car Preferences Setup*\n\n"
-                f"Step 6/{context.user_data['total_steps']}: Fuel Type\n\n"
-                "What fuel type are you interested in?",
-                parse_mode="MARKDOWN",
-                reply_markup=ReplyKeyboardMarkup(FUEL_OPTIONS, one_time_keyboard=True)
-            )
-        return FUEL
+        return await _ask_step(update, context, FUEL)
     else:
         # Skip advanced options, go to confirmation
         prefs = context.user_data['car_preferences']
         
         # Default values for advanced options if not editing
         if not context.user_data.get('editing'):
-            context.user_data['car_preferences']['fuel_type'] = "Any"
-            context.user_data['car_preferences']['transmission'] = "Any"
-        
-        # Build a nicely formatted summary card
-        summary = (
-            "*Preference Summary*\n"
-            "───────────────────────\n"
-            f"*Make:* {prefs.get('make', 'Not specified')}\n"
-            f"*Model:* {prefs.get('model', 'Not specified')}\n"
-            f"*Year Range:* {prefs.get('year_range', 'Not specified')}\n"
-            f"*Price Range:* {prefs.get('price_range', 'Not specified')}\n"
-            f"*Location:* {prefs.get('location', 'Not specified')}\n"
-            f"*Fuel Type:* {prefs.get('fuel_type', 'Any')}\n"
-            f"*Transmission:* {prefs.get('transmission', 'Any')}\n"
-            "───────────────────────\n\nIs this correct?"
-        )
+            prefs.fuel_type = "Any"
+            prefs.transmission = "Any"
         
-        await update.message.reply_text(
-            summary,
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
-        )
-        return CONFIRM
+        return await _ask_confirm(update, prefs)
 
 async def fuel_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle fuel type selection."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
-    
-    # Check if user wants to keep current fuel type when editing
-    if text == 'Keep Current' and context.user_data.get('editing'):
-        # Skip to transmission with current fuel type
-        
-        # Increment step counter
-        context.user_data['setup_step'] = 7
-        
-        # Ask for transmission
-        current_trans = context.user_data['car_preferences'].get('transmission', 'Any')
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 7/{context.user_data['total_steps']}: Transmission\n\n"
-            f"Current transmission: {current_trans}\n\n"
-            "Select a new transmission type or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(TRANSMISSION_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-        return TRANSMISSION
-    
-    # Save fuel type
-    context.user_data['car_preferences']['fuel_type'] = text
-    
-    # Increment step counter
-    context.user_data['setup_step'] = 7
+    # Save fuel type unless the user is keeping the current one
+    if not (text == 'Keep Current' and context.user_data.get('editing')):
+        # Listings are matched on these exact values, so re-ask for anything else
+        if text not in FUEL_CHOICES:
+            await update.message.reply_text(
+                "That isn't one of the fuel types I can match on. Please choose one of the options below."
+            )
+            return await _ask_step(update, context, FUEL)
+        context.user_data['car_preferences'].fuel_type = text
     
     # Ask for transmission
-    if context.user_data.get('editing'):
-        current_trans = context.user_data['car_preferences'].get('transmission', 'Any')
-        
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 7/{context.user_data['total_steps']}: Transmission\n\n"
-            f"Current transmission: {current_trans}\n\n"
-            "Select a new transmission type or keep the current one:",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(TRANSMISSION_OPTIONS + [['Keep Current']], one_time_keyboard=True)
-        )
-    else:
-        await update.message.reply_text(
-            "*AutoSniper Car Preferences Setup*\n\n"
-            f"Step 7/{context.user_data['total_steps']}: Transmission\n\n"
-            "What transmission type are you interested in?",
-            parse_mode="MARKDOWN",
-            reply_markup=ReplyKeyboardMarkup(TRANSMISSION_OPTIONS, one_time_keyboard=True)
-        )
-    return TRANSMISSION
+    return await _ask_step(update, context, TRANSMISSION)
 
 async def transmission_type(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle transmission type selection."""
     text = update.message.text
     
-    if text.lower() == 'cancel':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        return ConversationHandler.END
+    prefs = context.user_data['car_preferences']
     
     # Check if user wants to keep current transmission when editing
     if text == 'Keep Current' and context.user_data.get('editing'):
         # Skip to confirmation with current transmission
         pass
+    elif text not in TRANSMISSION_CHOICES:
+        # Listings are matched on these exact values, so re-ask for anything else
+        await update.message.reply_text(
+            "That isn't one of the transmission types I can match on. Please choose one of the options below."
+        )
+        return await _ask_step(update, context, TRANSMISSION)
     else:
         # Save transmission type
-        context.user_data['car_preferences']['transmission'] = text
+        prefs.transmission = text
     
     # Show summary and ask for confirmation
+    return await _ask_confirm(update, prefs)
+
+async def _save_preferences(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Save the confirmed car preferences to Google Sheets."""
+    # Save to Google Sheets
+    sheets_manager = context.bot_data['sheets_manager']
+    user_id = update.effective_user.id
     prefs = context.user_data['car_preferences']
     
-    # Build a nicely formatted summary card
-    summary = (
-        "*Preference Summary*\n"
-        "───────────────────────\n"
-        f"*Make:* {prefs.get('make', 'Not specified')}\n"
-        f"*Model:* {prefs.get('model', 'Not specified')}\n"
-        f"*Year Range:* {prefs.get('year_range', 'Not specified')}\n"
-        f"*Price Range:* {prefs.get('price_range', 'Not specified')}\n"
-        f"*Location:* {prefs.get('location', 'Not specified')}\n"
-        f"*Fuel Type:* {prefs.get('fuel_type', 'Not specified')}\n"
-        f"*Transmission:* {prefs.get('transmission', 'Not specified')}\n"
-        "───────────────────────\n\nIs this correct?"
-    )
+    # Get directly stored min/max year and price values
+    min_year = prefs.min_year
+    max_year = prefs.max_year
+    min_price = prefs.min_price
+    max_price = prefs.max_price
     
-    await update.message.reply_text(
-        summary,
-        parse_mode="MARKDOWN",
-        reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
-    )
-    return CONFIRM
-
-async def confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Handle confirmation of car preferences."""
-    text = update.message.text.lower()
+    # Add optional params
+    fuel_type = prefs.fuel_type or 'Any'
+    transmission = prefs.transmission or 'Any'
     
-    if text == 'cancel' or text == 'no':
-        await update.message.reply_text(
-            "Car preference setup cancelled. You can restart anytime with /mycars.",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        # Clear user data
-        if 'car_preferences' in context.user_data:
-            del context.user_data['car_preferences']
-        return ConversationHandler.END
+    # Show a typing indicator while saving; it goes out alongside the Sheets write rather
+    # than before it, and the result below is the only message sent
+    typing = asyncio.create_task(update.message.chat.send_action(ChatAction.TYPING))
     
-    if text == 'yes':
-        # Simple saving message
-        saving_message = await update.message.reply_text("Saving your preferences...")
-        
-        # Save to Google Sheets
-        sheets_manager = context.bot_data['sheets_manager']
-        prefs = context.user_data['car_preferences']
-        
-        # Get directly stored min/max year and price values
-        min_year = prefs.get('min_year', 0)
-        max_year = prefs.get('max_year', 9999)
-        min_price = prefs.get('min_price', 0)
-        max_price = prefs.get('max_price', 9999999)
-        
-        # Add optional params
-        fuel_type = prefs.get('fuel_type', 'Any')
-        transmission = prefs.get('transmission', 'Any')
-        
-        # Check if we're editing an existing preference
+    # Check if we're editing an existing preference
+    old_pref = None
+    try:
         if context.user_data.get('editing'):
             # If editing, first set the old preference to inactive
             old_pref = context.user_data.get('all_preferences', [])[context.user_data.get('edit_index', 0)]
-            sheets_manager.set_preference_inactive(
-                user_id=update.effective_user.id,
+            await asyncio.to_thread(
+                sheets_manager.set_preference_inactive,
+                user_id=user_id,
                 make=old_pref['make'],
                 model=old_pref['model']
             )
         
         # Add the new/updated preference
-        success = sheets_manager.add_car_preferences(
-            user_id=update.effective_user.id,
-            make=prefs.get('make', ''),
-            model=prefs.get('model', ''),
+        success = await asyncio.to_thread(
+            sheets_manager.add_car_preferences,
+            user_id=user_id,
+            make=prefs.make,
+            model=prefs.model,
             min_year=min_year,
             max_year=max_year,
             min_price=min_price,
             max_price=max_price,
-            location=prefs.get('location', ''),
+            location=prefs.location,
             fuel_type=fuel_type,
             transmission=transmission
         )
-        
-        if success:
-            if context.user_data.get('editing'):
-                await update.message.reply_text(
-                    "Your car preferences have been updated successfully! AutoSniper will now look "
-                    "for deals matching your updated criteria.\n\n"
-                    "You can manage your preferences anytime by using the /mycars command.",
-                    reply_markup=ReplyKeyboardRemove()
-                )
-            else:
-                await update.message.reply_text(
-                    "Your car preferences have been saved successfully! AutoSniper will now start looking "
-                    "for deals matching your criteria.\n\n"
-                    "You'll receive alerts when we find cars that match your preferences. "
-                    "You can update your preferences anytime by using the /mycars command.",
-                    reply_markup=ReplyKeyboardRemove()
-                )
+    except Exception as e:
+        logger.error("Error saving car preferences for user %s: %s", user_id, e)
+        success = False
+    finally:
+        # Always collect the indicator task; it is cosmetic, so a failed send is ignored
+        await asyncio.gather(typing, return_exceptions=True)
+    
+    if success:
+        # Write the saved row through so the next /mycars doesn't re-read the sheet
+        update_cached_preferences(user_id, {
+            'make': prefs.make,
+            'model': prefs.model,
+            'min_year': min_year,
+            'max_year': max_year,
+            'min_price': min_price,
+            'max_price': max_price,
+            'location': prefs.location,
+            'fuel_type': fuel_type,
+            'transmission': transmission
+        }, replaced=old_pref)
+    else:
+        invalidate_cached_preferences(user_id)
+    
+    if success:
+        if context.user_data.get('editing'):
+            await update.message.reply_text(
+                "Your car preferences have been updated successfully! AutoSniper will now look "
+                "for deals matching your updated criteria.\n\n"
+                "You can manage your preferences anytime by using the /mycars command.",
+                reply_markup=REMOVE_KEYBOARD
+            )
         else:
             await update.message.reply_text(
-                "There was an error saving your preferences. Please try again later or contact support.",
-                reply_markup=ReplyKeyboardRemove()
+                "Your car preferences have been saved successfully! AutoSniper will now start looking "
+                "for deals matching your criteria.\n\n"
+                "You'll receive alerts when we find cars that match your preferences. "
+                "You can update your preferences anytime by using the /mycars command.",
+                reply_markup=REMOVE_KEYBOARD
             )
-        
+    else:
+        await update.message.reply_text(
+            "There was an error saving your preferences. Please try again later or contact support.",
+            reply_markup=REMOVE_KEYBOARD
+        )
+    
+    # Clear user data
+    _clear_setup_data(context.user_data)
+    
+    return ConversationHandler.END
+
+async def confirm(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Handle confirmation of car preferences."""
+    text = update.message.text.strip().casefold()
+    
+    if text in NO_ANSWERS:
         # Clear user data
-        if 'car_preferences' in context.user_data:
-            del context.user_data['car_preferences']
-        if 'setup_step' in context.user_data:
-            del context.user_data['setup_step']
-        if 'total_steps' in context.user_data:
-            del context.user_data['total_steps']
-        if 'editing' in context.user_data:
-            del context.user_data['editing']
-        if 'edit_index' in context.user_data:
-            del context.user_data['edit_index']
-        if 'all_preferences' in context.user_data:
-            del context.user_data['all_preferences']
-            
-        return ConversationHandler.END
+        _clear_setup_data(context.user_data)
+        return await _cancel_reply(update)
+    
+    if text in YES_ANSWERS:
+        return await _save_preferences(update, context)
     
     # If response wasn't yes or no
     await update.message.reply_text(
         "Please confirm if the preferences are correct by selecting Yes or No.",
-        reply_markup=ReplyKeyboardMarkup([['Yes', 'No']], one_time_keyboard=True)
+        reply_markup=YES_NO_KEYBOARD
     )
     return CONFIRM
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel the conversation."""
-    await update.message.reply_text(
-        "Car preference setup cancelled. You can restart anytime with /mycars.",
-        reply_markup=ReplyKeyboardRemove()
-    )
-    
     # Clear only car preferences data, not all user data
-    if 'car_preferences' in context.user_data:
-        del context.user_data['car_preferences']
-    if 'setup_step' in context.user_data:
-        del context.user_data['setup_step']
-    if 'total_steps' in context.user_data:
-        del context.user_data['total_steps']
-    if 'editing' in context.user_data:
-        del context.user_data['editing']
-    if 'edit_index' in context.user_data:
-        del context.user_data['edit_index']
-    if 'all_preferences' in context.user_data:
-        del context.user_data['all_preferences']
+    _clear_setup_data(context.user_data)
+    return await _cancel_reply(update)
+
+async def conversation_timeout(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """End a setup the user abandoned, freeing its user_data."""
+    _clear_setup_data(context.user_data)
+    # The last update may have been a button press, so reply via effective_message
+    await update.effective_message.reply_text(
+        "Car preference setup timed out. You can restart anytime with /mycars.",
+        reply_markup=REMOVE_KEYBOARD
+    )
     return ConversationHandler.END
 
 def get_car_preferences_conversation(sheets_manager):
-    """Return a ConversationHandler for collecting car preferences."""
+    """Return a ConversationHandler for collecting car preferences.
+    
+    ConversationHandler needs updates processed one at a time, so the application leaves
+    concurrent_updates off and other chats wait while a handler here awaits Sheets. Every
+    Sheets call still goes through asyncio.to_thread so jobs and background tasks keep running.
+    
+    The conversation is not persistent, so a restart ends setups in progress. The bot runs on
+    an ephemeral filesystem (see Procfile), where a local PicklePersistence file would not
+    survive a restart, and PTB doesn't re-arm conversation_timeout for restored conversations.
+    """
+    # Typed answers for each step; "cancel" is left to the fallback so it clears the setup
+    answer_filter = filters.TEXT & ~filters.COMMAND & ~filters.Regex(CANCEL_PATTERN)
     
     return ConversationHandler(
         entry_points=[CommandHandler("mycars", start_car_setup)],
         states={
             CHOOSE_ACTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, choose_action)],
             SELECT_PREFERENCE: [CallbackQueryHandler(select_preference)],
-            CONFIRM_DELETE: [MessageHandler(filters.TEXT & ~filters.COMMAND, confirm_delete)],
-            MAKE: [MessageHandler(filters.TEXT & ~filters.COMMAND, car_make)],
-            MODEL: [MessageHandler(filters.TEXT & ~filters.COMMAND, car_model)],
-            YEAR: [MessageHandler(filters.TEXT & ~filters.COMMAND, year_range)],
-            PRICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, price_range)],
-            LOCATION: [MessageHandler(filters.TEXT & ~filters.COMMAND, location)],
-            ADVANCED: [MessageHandler(filters.TEXT & ~filters.COMMAND, advanced_options)],
-            FUEL: [MessageHandler(filters.TEXT & ~filters.COMMAND, fuel_type)],
-            TRANSMISSION: [MessageHandler(filters.TEXT & ~filters.COMMAND, transmission_type)],
-            CONFIRM: [MessageHandler(filters.TEXT & ~filters.COMMAND, confirm)]
+            CONFIRM_DELETE: [MessageHandler(answer_filter, confirm_delete)],
+            MAKE: [MessageHandler(answer_filter, car_make)],
+            CUSTOM_MAKE: [MessageHandler(answer_filter, custom_car_make)],
+            MODEL: [MessageHandler(answer_filter, car_model)],
+            YEAR: [MessageHandler(answer_filter, year_range)],
+            CUSTOM_YEAR: [MessageHandler(answer_filter, custom_year_range)],
+            PRICE: [MessageHandler(answer_filter, price_range)],
+            LOCATION: [MessageHandler(answer_filter, location)],
+            ADVANCED: [MessageHandler(answer_filter, advanced_options)],
+            FUEL: [MessageHandler(answer_filter, fuel_type)],
+            TRANSMISSION: [MessageHandler(answer_filter, transmission_type)],
+            CONFIRM: [MessageHandler(answer_filter, confirm)],
+            # Receives whatever update last advanced the conversation, message or callback
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, conversation_timeout)]
         },
         fallbacks=[
             CommandHandler("cancel", cancel),
-            MessageHandler(filters.Regex('^[Cc]ancel$'), cancel)
+            MessageHandler(filters.Regex(CANCEL_PATTERN), cancel)
         ],
         name="car_preferences",
         persistent=False,
-        allow_reentry=True
+        allow_reentry=True,
+        conversation_timeout=CONVERSATION_TIMEOUT
     )
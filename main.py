@@ -11,14 +11,15 @@ from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import (
     Application, CommandHandler, ContextTypes, MessageHandler, 
-    filters, CallbackQueryHandler, ConversationHandler
+    filters, CallbackQueryHandler, ConversationHandler,
+    AIORateLimiter
 )
 
 from sheets import get_sheets_manager
-from conversations import get_car_preferences_conversation
+from conversations import get_car_preferences_conversation, get_cached_preferences
 from scraper_manager import get_scraper_manager
 from scheduler import get_scheduler
-from alerts import AlertEngine
+from alerts import get_alert_engine
 from payments import get_payment_manager
 from subscription import get_subscription_manager, SUBSCRIPTION_FEATURES
 from middleware import get_subscription_middleware
@@ -28,6 +29,14 @@ from tutorials import get_tutorial_manager
 load_dotenv()
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 
+# HTTP connection pool shared by the handlers and the alert engine's concurrent sends
+BOT_CONNECTION_POOL_SIZE = 20
+
+# Outgoing requests across all handlers and alerts stay under Telegram's ~30 messages/second
+# per bot (and 20/minute per group). This layer only paces requests: a 429 is raised rather
+# than retried, and AlertEngine.send_alert owns retrying alerts after their retry_after
+BOT_MAX_MESSAGES_PER_SECOND = 28
+
 # Enable logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO
@@ -47,7 +56,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     
     # Store user information in Google Sheets
     if sheets_manager:
-        user_added = sheets_manager.add_user(
+        # Sheets calls are blocking; run them off the event loop
+        user_added = await asyncio.to_thread(
+            sheets_manager.add_user,
             user_id=user.id,
             first_name=user.first_name,
             last_name=user.last_name,
@@ -89,9 +100,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         return
     
     # Check if this is a returning user
-    if sheets_manager and sheets_manager.user_exists(user.id):
-        # Get basic user stats
-        car_preferences = sheets_manager.get_car_preferences(user.id) if sheets_manager else []
+    if sheets_manager and await asyncio.to_thread(sheets_manager.user_exists, user.id):
+        # Get basic user stats, sharing the /mycars preferences cache
+        car_preferences = await get_cached_preferences(sheets_manager, user.id)
         preference_count = len(car_preferences)
         
         # Create keyboard for returning users
@@ -770,7 +781,7 @@ async def process_alerts_background(update: Update, context: ContextTypes.DEFAUL
            return
        
        # Initialize the alert engine
-       alert_engine = AlertEngine(context.bot)
+       alert_engine = get_alert_engine(context.bot)
        
        # Process matches and send alerts
        alert_stats = await alert_engine.process_matches(
@@ -817,7 +828,7 @@ async def run_scraper_job_background(update: Update, context: ContextTypes.DEFAU
        # Check if there are matches to process
        if stats.get("matches", 0) > 0:
            # Initialize the alert engine
-           alert_engine = AlertEngine(context.bot)
+           alert_engine = get_alert_engine(context.bot)
            
            # Get matches from the most recent scraper run (implementation depends on your structure)
            matches = {}  # This should be populated with actual matches
@@ -1278,7 +1289,19 @@ async def suggest_relevant_tutorial(update: Update, context: ContextTypes.DEFAUL
 def main():
    """Start the bot without using asyncio.run() which can cause issues in some environments"""
    # Create the Application and pass it your bot's token
-   application = Application.builder().token(TELEGRAM_TOKEN).build()
+   application = (
+       Application.builder()
+       .token(TELEGRAM_TOKEN)
+       .rate_limiter(AIORateLimiter(
+           overall_max_rate=BOT_MAX_MESSAGES_PER_SECOND,
+           max_retries=0
+       ))
+       .connection_pool_size(BOT_CONNECTION_POOL_SIZE)
+       .connect_timeout(5)
+       .read_timeout(10)
+       .pool_timeout(10)
+       .build()
+   )
 
    # Store sheets_manager in bot_data for access in conversation handlers
    if sheets_manager:
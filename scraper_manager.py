@@ -208,19 +208,15 @@ class ScraperManager:
             return []
         
         try:
-            # Get all car preferences
-            all_preferences = []
-            
             # Get all users from the Users sheet
             users = self.sheets_manager.users_sheet.get_all_records()
+            user_ids = [user.get('user_id') for user in users if user.get('user_id')]
             
-            for user in users:
-                user_id = user.get('user_id')
-                if not user_id:
-                    continue
-                
-                # Get preferences for this user
-                user_preferences = self.sheets_manager.get_car_preferences(user_id)
+            # Read the Cars sheet once for every user instead of once per user
+            preferences_by_user = self.sheets_manager.get_car_preferences_batch(user_ids)
+            
+            all_preferences = []
+            for user_preferences in preferences_by_user.values():
                 all_preferences.extend(user_preferences)
             
             self.logger.info(f"Retrieved {len(all_preferences)} active preferences from Google Sheets")
@@ -409,6 +409,52 @@ class SheetsManager:
         except Exception as e:
             print(f"Error adding car preferences: {e}")
             return False
+
+    def add_car_preferences_batch(self, preferences):
+        """Add several car preferences in a single Sheets API call.
+        
+        Args:
+            preferences: List of dictionaries with the same keys as the
+                arguments of add_car_preferences (fuel_type and
+                transmission default to "Any")
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not preferences:
+            return True
+        
+        try:
+            # Current timestamp
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            
+            rows = [
+                [
+                    pref['user_id'],
+                    pref['make'],
+                    pref['model'],
+                    pref['min_year'],
+                    pref['max_year'],
+                    pref['min_price'],
+                    pref['max_price'],
+                    pref['location'],
+                    pref.get('fuel_type', "Any"),
+                    pref.get('transmission', "Any"),
+                    timestamp,  # created_at
+                    timestamp,  # updated_at
+                    'active'    # status
+                ]
+                for pref in preferences
+            ]
+            
+            # One append request for all rows instead of one per preference
+            self.cars_sheet.append_rows(rows, value_input_option='USER_ENTERED')
+            
+            print(f"Added {len(rows)} car preferences in one batch.")
+            return True
+        except Exception as e:
+            print(f"Error adding car preferences batch: {e}")
+            return False
     
     def get_car_preferences(self, user_id):
         """Get all car preferences for a user.
@@ -434,6 +480,34 @@ class SheetsManager:
             print(f"Error getting car preferences: {e}")
             return []
     
+    def get_car_preferences_batch(self, user_ids):
+        """Get active car preferences for several users with one sheet read.
+        
+        Args:
+            user_ids: Iterable of Telegram user IDs
+            
+        Returns:
+            dict: Mapping of user_id (as str) to a list of preference dictionaries;
+                users without active preferences map to an empty list
+        """
+        grouped = {str(user_id): [] for user_id in user_ids}
+        
+        try:
+            # Read the Cars sheet once and group rows by user
+            all_data = self.cars_sheet.get_all_records()
+            
+            for row in all_data:
+                if row.get('status', '') != 'active':
+                    continue
+                user_preferences = grouped.get(str(row['user_id']))
+                if user_preferences is not None:
+                    user_preferences.append(row)
+            
+            return grouped
+        except Exception as e:
+            print(f"Error getting car preferences batch: {e}")
+            return grouped
+    
     def set_preference_inactive(self, user_id, make, model):
         """Set a specific car preference to inactive
         
@@ -635,8 +709,22 @@ class SheetsManager:
         return listing_id
 
 
-# Helper function to create a sheets manager from environment variables
+# Global sheets manager instance, shared so the authorized client is reused across callers
+_sheets_manager = None
+
 def get_sheets_manager():
+    """Get the global SheetsManager instance, creating it from environment variables.
+    
+    Returns:
+        SheetsManager: Instance of the SheetsManager class, or None if it couldn't be created
+    """
+    global _sheets_manager
+    if _sheets_manager is None:
+        _sheets_manager = _create_sheets_manager()
+    return _sheets_manager
+
+# Helper function to create a sheets manager from environment variables
+def _create_sheets_manager():
     """Create a SheetsManager instance using environment variables.
     
     Returns: